@@ -41,8 +41,18 @@ Terminology:
 """
 
 from abc import ABC, abstractmethod
-from collections import namedtuple
-from decimal import Decimal
+import bisect
+from collections import deque, namedtuple
+from collections.abc import Sequence
+from decimal import Context, Decimal, localcontext
+import functools
+import itertools
+import math
+import operator
+import threading
+import time
+from typing import NamedTuple
+import weakref
 
 from .utils import *
 
@@ -57,7 +67,8 @@ __all__ = [
     'OrderBook',
     'Bid',
     'Ask',
-    'ExchangeAPI'
+    'ExchangeAPI',
+    'LiveCacheMixin'
 ]
 
 class ExchangeAPIError(RuntimeError):
@@ -82,69 +93,408 @@ class NotSupportedError(ExchangeAPIError):
     by the underlying exchange API)."""
     pass
 
-"""A named tuple representing information for a particular currency pair.
+_DECIMAL_ZERO = Decimal(0)
+
+# The context used for arithmetic in long reductions over Decimal amounts, entered once for the whole reduction; it has
+# the same precision and rounding as the default context
+_DECIMAL_CONTEXT = Context()
+
+# The maximum number of time periods for which ExchangeAPI.get_volume_within(...) keeps retrieved trades
+_TRADE_HISTORY_CACHE_SIZE = 32
+
+def _scale_to_ulp(value, ulp):
+    """Express a Decimal value as an integer multiple of a ULP.
+
+    Raises:
+        ValueError: if value is not a whole multiple of ulp
+    """
+    scaled = value / ulp
+    if scaled != scaled.to_integral_value():
+        raise ValueError("Value is not a multiple of the ULP")
+    return int(scaled)
+
+# A cache mapping ULPs to functions created by _make_ulp_parser(...)
+_ULP_PARSERS = {}
+
+def _make_ulp_parser(ulp):
+    """Create a function which parses a string representing a decimal number into an integer multiple of ulp.
+
+    If ulp is a power of ten with a negative exponent (eg. 0.00000001), the function is specialized to that number of
+    decimal places: it shifts the decimal point by padding the fractional digits with zeros and then parses the digits
+    as an int, without constructing a Decimal. Any string it cannot handle this way is parsed with Decimal instead.
+    """
+    def parse_generic(s):
+        return _scale_to_ulp(Decimal(s), ulp)
+    sign, digits, exponent = ulp.normalize().as_tuple()
+    if sign != 0 or digits != (1,) or exponent >= 0:
+        return parse_generic
+    places = -exponent
+    def parse(s):
+        whole, point, frac = s.partition('.')
+        if len(frac) <= places:
+            try:
+                return int(whole + frac + '0' * (places - len(frac)))
+            except ValueError:
+                pass
+        return parse_generic(s)
+    return parse
+
+class PairInfo(NamedTuple):
+    """A named tuple representing information for a particular currency pair.
+
+    Amounts (in the base currency) and rates (in the quote currency) for the pair can be expressed as integer multiples
+    of the respective ULP, which is much cheaper to add and subtract than Decimal; the methods of this class convert
+    between the two representations.
+
+    base_ulp: the unit of the last place (the smallest representable amount) of the base currency
+    quote_ulp: the unit of the last place (the smallest representable amount) of the quote currency
+    """
+    base_ulp: Decimal
+    quote_ulp: Decimal
+    def to_scaled_amount(self, amount):
+        """Convert an amount, in the base currency, to an integer multiple of base_ulp.
 
-base_ulp: the unit of the last place (the smallest representable amount) of the base currency
-quote_ulp: the unit of the last place (the smallest representable amount) of the quote currency
-"""
-PairInfo = namedtuple("PairInfo", ("base_ulp", "quote_ulp"))
-
-"""A named tuple representing the ticker values for a particular currency pair.
+        Raises:
+            ValueError: if amount is not a whole multiple of base_ulp
+        """
+        return _scale_to_ulp(amount, self.base_ulp)
+    def to_scaled_rate(self, rate):
+        """Convert a rate, in the quote currency, to an integer multiple of quote_ulp.
 
-highest_bid: the highest bid for this currency pair
-lowest_ask: the lowest ask for this currency pair
-last: the rate of the last trade made for this currency pair
-base_volume: the 24-hour volume of the base currency for this currency pair
-quote_volume: the 24-hour volume of the quote currency for this currency pair
-percent_change: the percentage change of the value of this pair from 24 hours ago, represented as a decimal
-"""
-Ticker = namedtuple("Ticker", ("highest_bid", "lowest_ask", "last", "base_volume", "quote_volume", "percent_change"))
+        Raises:
+            ValueError: if rate is not a whole multiple of quote_ulp
+        """
+        return _scale_to_ulp(rate, self.quote_ulp)
+    def parse_amount(self, s):
+        """Parse a string representing an amount, in the base currency, into an integer multiple of base_ulp.
 
-"""A named tuple representing the order book for a particular currency pair.
+        Raises:
+            ValueError: if the amount is not a whole multiple of base_ulp
+        """
+        return self._parser(self.base_ulp)(s)
+    def parse_rate(self, s):
+        """Parse a string representing a rate, in the quote currency, into an integer multiple of quote_ulp.
 
-bids: a tuple of Bid objects in descending order by rate for this currency pair
-asks: a tuple of Ask objects in ascending order by rate for this currency pair
-"""
-OrderBook = namedtuple("OrderBook", ("bids", "asks"))
+        Raises:
+            ValueError: if the rate is not a whole multiple of quote_ulp
+        """
+        return self._parser(self.quote_ulp)(s)
+    @staticmethod
+    def _parser(ulp):
+        parser = _ULP_PARSERS.get(ulp)
+        if parser is None:
+            parser = _ULP_PARSERS[ulp] = _make_ulp_parser(ulp)
+        return parser
+    def to_decimal_amount(self, n):
+        """Convert an integer multiple of base_ulp to an amount, in the base currency, as a Decimal."""
+        return Decimal(n) * self.base_ulp
+    def to_decimal_rate(self, n):
+        """Convert an integer multiple of quote_ulp to a rate, in the quote currency, as a Decimal."""
+        return Decimal(n) * self.quote_ulp
+
+class Ticker(NamedTuple):
+    """A named tuple representing the ticker values for a particular currency pair.
+
+    highest_bid: the highest bid for this currency pair
+    lowest_ask: the lowest ask for this currency pair
+    last: the rate of the last trade made for this currency pair
+    base_volume: the 24-hour volume of the base currency for this currency pair
+    quote_volume: the 24-hour volume of the quote currency for this currency pair
+    percent_change: the percentage change of the value of this pair from 24 hours ago, represented as a decimal
+    """
+    highest_bid: Decimal
+    lowest_ask: Decimal
+    last: Decimal
+    base_volume: Decimal
+    quote_volume: Decimal
+    percent_change: Decimal
+
+def _rate_scaled(self, pair_info):
+    """Get the rate as an integer multiple of the quote currency's ULP, given the PairInfo object for the pair."""
+    return pair_info.to_scaled_rate(self.rate)
+
+def _amount_scaled(self, pair_info):
+    """Get the amount as an integer multiple of the base currency's ULP, given the PairInfo object for the pair."""
+    return pair_info.to_scaled_amount(self.amount)
+
+class Bid(NamedTuple):
+    """A named tuple representing a single bid for a particular currency pair.
+
+    rate: the rate, in the quote currency, offered for one unit of the base currency
+    amount: the amount, in the base currency, being requested in this bid
+    """
+    rate: Decimal
+    amount: Decimal
+    rate_scaled = _rate_scaled
+    amount_scaled = _amount_scaled
+
+class Ask(NamedTuple):
+    """A named tuple representing a single ask for a particular currency pair.
+
+    rate: the rate, in the quote currency, requested for one unit of the base currency
+    amount: the amount, in the base currency, being offered in this ask
+    """
+    rate: Decimal
+    amount: Decimal
+    rate_scaled = _rate_scaled
+    amount_scaled = _amount_scaled
+
+class _BookSide(Sequence):
+    """A read-only sequence over one side of an OrderBook which constructs Bid or Ask objects only as they are accessed.
+
+    Args:
+        level_type: the type of the objects in this sequence, Bid or Ask
+        rates: a tuple of the rates of the orders on this side of the book
+        amounts: a tuple of the amounts of the orders on this side of the book, in the same order as rates
+    """
+    __slots__ = ('_make_level', '_rates', '_amounts')
+    def __init__(self, level_type, rates, amounts):
+        # Build each level directly from a (rate, amount) tuple with tuple.__new__, which skips the Python-level
+        # __new__ that namedtuple generates
+        self._make_level = functools.partial(tuple.__new__, level_type)
+        self._rates = rates
+        self._amounts = amounts
+    def __len__(self):
+        return len(self._rates)
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(map(self._make_level, zip(self._rates[index], self._amounts[index])))
+        return self._make_level((self._rates[index], self._amounts[index]))
+    def __iter__(self):
+        return map(self._make_level, zip(self._rates, self._amounts))
+    # Compares and hashes as the tuple of its levels, as the tuples this view replaced did
+    def __eq__(self, other):
+        if isinstance(other, _BookSide):
+            return self._rates == other._rates and self._amounts == other._amounts
+        if isinstance(other, tuple):
+            return tuple(self) == other
+        return NotImplemented
+    def __hash__(self):
+        return hash(tuple(self))
+
+def _parse_raw_book_side(raw_levels):
+    """Convert raw (rate, amount) pairs into a tuple of rates and a tuple of amounts, both as Decimals. Numbers are
+    converted via str(...) so that floats are parsed as they were written rather than as their exact binary values."""
+    columns = tuple(zip(*raw_levels))
+    if not columns:
+        return (), ()
+    raw_rates, raw_amounts = columns
+    return tuple(map(Decimal, map(str, raw_rates))), tuple(map(Decimal, map(str, raw_amounts)))
+
+class OrderBook(namedtuple("OrderBook", ("bid_rates", "bid_amounts", "ask_rates", "ask_amounts", "bid_totals",
+        "ask_totals"))):
+    """A named tuple representing the order book for a particular currency pair.
+
+    The book is stored column-wise, with the rates and amounts of each side of the book in separate tuples, so that an
+    operation over a single column (eg. summing the amounts of the bids up to some depth) only needs to touch the values
+    in that column. The bids and asks properties provide a view of the book as Bid and Ask objects.
+
+    bid_rates: a tuple of the rates of all bids in descending order by rate for this currency pair
+    bid_amounts: a tuple of the amounts of all bids, in the same order as bid_rates
+    ask_rates: a tuple of the rates of all asks in ascending order by rate for this currency pair
+    ask_amounts: a tuple of the amounts of all asks, in the same order as ask_rates
+    bid_totals: a tuple of the form (cumulative_base, cumulative_quote) holding the running totals of the bids' amounts
+                and of their totals (rate * amount), as tuples in the same order as bid_rates; computed from the other
+                columns when the order book is created if None is given
+    ask_totals: the running totals of the asks, in the same form as bid_totals
+    """
+    __slots__ = ()
+    def __new__(cls, bid_rates, bid_amounts, ask_rates, ask_amounts, bid_totals=None, ask_totals=None):
+        # The running totals are computed once, so that every query on the book is a bisection rather than a sum
+        if bid_totals is None:
+            bid_totals = _cumulative_totals(bid_rates, bid_amounts)
+        if ask_totals is None:
+            ask_totals = _cumulative_totals(ask_rates, ask_amounts)
+        return super().__new__(cls, bid_rates, bid_amounts, ask_rates, ask_amounts, bid_totals, ask_totals)
+    def _replace(self, **kwargs):
+        # namedtuple's _replace(...) bypasses __new__, so the running totals of a replaced column would go stale
+        if 'bid_rates' in kwargs or 'bid_amounts' in kwargs:
+            kwargs.setdefault('bid_totals', None)
+        if 'ask_rates' in kwargs or 'ask_amounts' in kwargs:
+            kwargs.setdefault('ask_totals', None)
+        return type(self)(**{**self._asdict(), **kwargs})
+    @classmethod
+    def from_raw(cls, raw_bids, raw_asks):
+        """Create an order book from raw bids and asks, as found in the responses of most exchanges' APIs.
+
+        Each side is transposed into its two columns with a single zip(...), and each column is then converted as a
+        whole with map(...), rather than constructing each level one at a time.
 
-"""A named tuple representing a single bid for a particular currency pair.
+        Args:
+            raw_bids: an iterable of (rate, amount) pairs in descending order by rate, where each rate and amount is
+                either a string, an int or a float representing a decimal number
+            raw_asks: an iterable of (rate, amount) pairs in ascending order by rate, in the same format as raw_bids
+        Returns:
+            the new OrderBook object
+        """
+        bid_rates, bid_amounts = _parse_raw_book_side(raw_bids)
+        ask_rates, ask_amounts = _parse_raw_book_side(raw_asks)
+        return cls(bid_rates=bid_rates, bid_amounts=bid_amounts, ask_rates=ask_rates, ask_amounts=ask_amounts)
+    @property
+    def bids(self):
+        """A sequence of Bid objects in descending order by rate for this currency pair."""
+        return _BookSide(Bid, self.bid_rates, self.bid_amounts)
+    @property
+    def asks(self):
+        """A sequence of Ask objects in ascending order by rate for this currency pair."""
+        return _BookSide(Ask, self.ask_rates, self.ask_amounts)
+    def cumulative_base(self, side):
+        """Get the running total of the amounts, in the base currency, on one side of this order book.
 
-rate: the rate, in the quote currency, offered for one unit of the base currency
-amount: the amount, in the base currency, being requested in this bid
-"""
-Bid = namedtuple("Bid", ("rate", "amount"))
+        Args:
+            side: the side of the order book, 'bids' or 'asks'
+        Returns:
+            a tuple whose ith element is the total amount of the first i + 1 orders on the specified side of the book
+        """
+        return self._cumulative(side)[0]
+    def price_for_volume(self, side, volume):
+        """Get the total, in the quote currency, for which an amount of the base currency would be exchanged by filling
+        the orders on one side of this order book in order, starting with the best rate.
 
-"""A named tuple representing a single ask for a particular currency pair.
+        For example, order_book.price_for_volume('asks', 10) is the cost of buying 10 units of the base currency.
 
-rate: the rate, in the quote currency, requested for one unit of the base currency
-amount: the amount, in the base currency, being offered in this ask
-"""
-Ask = namedtuple("Ask", ("rate", "amount"))
+        Args:
+            side: the side of the order book, 'bids' or 'asks'
+            volume: the amount, in the base currency, to be exchanged
+        Returns:
+            the total, in the quote currency, for which volume would be exchanged
+        Raises:
+            InsufficientInformationError: if there is less than volume on the specified side of this order book
+        """
+        volume = Decimal(str(volume))
+        if volume < 0:
+            raise ValueError("volume must be >= 0")
+        if volume == 0:
+            return _DECIMAL_ZERO
+        cumulative_base, cumulative_quote = self._cumulative(side)
+        i = bisect.bisect_left(cumulative_base, volume)
+        if i == len(cumulative_base):
+            raise InsufficientInformationError("Order book contains insufficient volume")
+        rates = self.bid_rates if side == 'bids' else self.ask_rates
+        if i == 0:
+            return volume * rates[0]
+        return cumulative_quote[i - 1] + (volume - cumulative_base[i - 1]) * rates[i]
+    def _cumulative(self, side):
+        if side == 'bids':
+            return self.bid_totals
+        elif side == 'asks':
+            return self.ask_totals
+        else:
+            raise ValueError("side must be 'bids' or 'asks'")
+
+def _cumulative_totals(rates, amounts):
+    """Get the running totals of the amounts and of the totals (rate * amount) of one side of an order book, as a tuple
+    of two tuples."""
+    return (tuple(itertools.accumulate(amounts)),
+            tuple(itertools.accumulate(rate * amount for rate, amount in zip(rates, amounts))))
+
+@functools.lru_cache(maxsize=512)
+def _split_pair(pair):
+    """Split a pair string into a tuple of the form (base, quote). Results are cached for the most recently used pairs,
+    so that the split of each pair is shared by all trades and orders for it."""
+    base, sep, quote = pair.partition('/')
+    return base, quote
+
+def _format_quantity(value, currency):
+    """Format a quantity of a currency for display.
+
+    Args:
+        value: the quantity, as a Decimal
+        currency: the symbol of the currency, or None if it is unknown
+    Raises:
+        InsufficientInformationError: if currency is None
+    """
+    if currency is None:
+        raise InsufficientInformationError("Pair is unknown")
+    return f"{value:f} {currency}"
+
+def _format_base_quantity(value, currencies):
+    """Format a quantity of the base currency of a (base, quote) pair of currencies for display."""
+    return _format_quantity(value, currencies[0])
+
+def _format_quote_quantity(value, currencies):
+    """Format a quantity of the quote currency of a (base, quote) pair of currencies for display."""
+    return _format_quantity(value, currencies[1])
+
+def _format_timestamp_field(value, currencies):
+    """Format a timestamp for display."""
+    return format_timestamp(value)
+
+def _format_yes_no(value, currencies):
+    """Format a boolean for display."""
+    return "Yes" if value else "No"
+
+def _format_info_field(getter, formatter, currencies):
+    """Get the value of a field described by ObjectInfo and format it for display."""
+    return formatter(getter(), currencies)
+
+def _build_info(obj):
+    """Generate a new ObjectInfo object that describes a Trade or an Order, from the _INFO_FIELDS of its class.
+
+    Only the getters bound to obj are created per call; each formatted field is a functools.partial(...) of
+    _format_info_field rather than a new closure.
+    """
+    info = ObjectInfo(obj.__class__.__qualname__)
+    pair = obj.get_pair_or_none()
+    currencies = _split_pair(pair) if pair is not None else (None, None)
+    for label, getter_name, formatter in obj._INFO_FIELDS:
+        getter = getattr(obj, getter_name)
+        if formatter is None:
+            info.add_info(label, getter)
+        else:
+            info.add_info(label, functools.partial(_format_info_field, getter, formatter, currencies))
+    return info
+
+def _path_rate(path, ticker):
+    """Get the estimated amount of the last currency of an exchange path, as returned by
+    ExchangeAPI.get_exchange_path(...), obtained for each unit of the first, using the last trade rates in ticker."""
+    rate = Decimal(1)
+    for order_type, pair in path:
+        if order_type == 'buy':
+            rate /= ticker[pair].last
+        else:
+            rate *= ticker[pair].last
+    return rate
+
+def _execute_async_batch(api_ref, request, args):
+    """Perform a batch of asynchronous requests for the ExchangeAPI referred to by api_ref, a weak reference."""
+    api = api_ref()
+    if api is None:
+        raise RuntimeError("The ExchangeAPI has been garbage collected")
+    return api._execute_async_batch(request, args)
 
 class ExchangeAPI(ABC):
     class Trade(ABC):
         """A handle for a single trade made between two members of an exchange. This type is interned."""
+        # Handles are created in large numbers, so they don't have a __dict__ unless a subclass omits __slots__;
+        # subclasses should declare __slots__ containing only their own attributes
+        __slots__ = ('api', '_pair')
+        # The fields described by info(), as (label, getter name, formatter) tuples, where formatter is None if the
+        # getter's result is displayed as is
+        _INFO_FIELDS = (
+            ("Trade Type", "get_trade_type", None),
+            ("Pair", "get_pair", None),
+            ("Rate", "get_rate", _format_quote_quantity),
+            ("Amount", "get_amount", _format_base_quantity),
+            ("Total", "get_total", _format_quote_quantity),
+            ("Fee", "get_fee", _format_base_quantity),
+            ("Timestamp", "get_timestamp", _format_timestamp_field))
+        def __init__(self, api):
+            """Initialize this trade handle.
+
+            Args:
+                api: a reference to the ExchangeAPI object that was used to retrieve this trade, stored as the
+                    attribute api
+            """
+            self.api = api
+            # The pair, which never changes for a given trade, stored by get_pair() once known
+            self._pair = None
         def info(self):
             """Generate a new ObjectInfo object that describes this object."""
-            info = ObjectInfo(self.__class__.__qualname__)
-            info.add_info("Trade Type", self.get_trade_type)
-            info.add_info("Pair", self.get_pair)
-            info.add_info("Rate", lambda: "{:f}".format(self.get_rate()) + ' ' + self.get_pair().split('/')[1])
-            info.add_info("Amount", lambda: "{:f}".format(self.get_amount()) + ' ' + self.get_pair().split('/')[0])
-            info.add_info("Total", lambda: "{:f}".format(self.get_total()) + ' ' + self.get_pair().split('/')[1])
-            info.add_info("Fee", lambda: "{:f}".format(self.get_fee()) + ' ' + self.get_pair().split('/')[0])
-            info.add_info("Timestamp", lambda: format_timestamp(self.get_timestamp()))
-            return info
+            return _build_info(self)
         def describe(self):
             """Print a description of this object to standard output."""
             print(self.info().format_multiline(), end="")
-        def __eq__(self, other):
-            return other is self
-        @property
-        @abstractmethod
-        def api(self):
-            """Get a reference to the ExchangeAPI object that was used to retrieve this trade."""
-            pass
         def get_trade_type(self):
             """Get the type of this trade, "buy" or "sell".
 
@@ -174,9 +524,12 @@ class ExchangeAPI(ABC):
             Raises:
                 InsufficientInformationError: if the trade pair is unknown
             """
-            pair = self.get_pair_or_none()
+            pair = self._pair
             if pair is None:
-                raise InsufficientInformationError("Trade pair is unknown")
+                pair = self.get_pair_or_none()
+                if pair is None:
+                    raise InsufficientInformationError("Trade pair is unknown")
+                self._pair = pair
             return pair
         @abstractmethod
         def get_pair_or_none(self):
@@ -227,6 +580,17 @@ class ExchangeAPI(ABC):
                 the amount of the base currency for which this trade was made, or None if the trade amount is unknown
             """
             pass
+        def get_amount_scaled(self):
+            """Get the amount of the base currency for which this trade was made, as an integer multiple of the base
+            currency's ULP.
+
+            Returns:
+                the amount of the base currency for which this trade was made, in units of the base currency's ULP
+            Raises:
+                InsufficientInformationError: if the trade amount or pair is unknown
+                ValueError: if the trade amount is not a whole multiple of the base currency's ULP
+            """
+            return self.api.get_pair_info(self.get_pair()).to_scaled_amount(self.get_amount())
         def get_total(self):
             """Get the amount of the quote currency for which this trade was made.
 
@@ -292,29 +656,36 @@ class ExchangeAPI(ABC):
     class Order(ABC):
         """A class that serves as a handle object that provides an interface to information related to and operations
         that can be performed on a single order. This type is interned."""
+        # Handles are created in large numbers, so they don't have a __dict__ unless a subclass omits __slots__;
+        # subclasses should declare __slots__ containing only their own attributes
+        __slots__ = ('api', '_pair')
+        # The fields described by info(), as (label, getter name, formatter) tuples, where formatter is None if the
+        # getter's result is displayed as is
+        _INFO_FIELDS = (
+            ("Order Type", "get_order_type", None),
+            ("Order Subtype", "get_order_subtype", None),
+            ("Pair", "get_pair", None),
+            ("Rate", "get_rate", _format_quote_quantity),
+            ("Amount", "get_amount", _format_base_quantity),
+            ("Total", "get_total", _format_quote_quantity),
+            ("Is Open", "is_open", _format_yes_no),
+            ("Amount Outstanding", "get_amount_outstanding", _format_base_quantity))
+        def __init__(self, api):
+            """Initialize this order handle.
+
+            Args:
+                api: a reference to the ExchangeAPI object that was used to retrieve this order, stored as the
+                    attribute api
+            """
+            self.api = api
+            # The pair, which never changes for a given order, stored by get_pair() once known
+            self._pair = None
         def info(self):
             """Generate a new ObjectInfo object that describes this object."""
-            info = ObjectInfo(self.__class__.__qualname__)
-            info.add_info("Order Type", self.get_order_type)
-            info.add_info("Order Subtype", self.get_order_subtype)
-            info.add_info("Pair", self.get_pair)
-            info.add_info("Rate", lambda: "{:f}".format(self.get_rate()) + " " + self.get_pair().split('/')[1])
-            info.add_info("Amount", lambda: "{:f}".format(self.get_amount()) + " " + self.get_pair().split('/')[0])
-            info.add_info("Total", lambda: "{:f}".format(self.get_total()) + " " + self.get_pair().split('/')[1])
-            info.add_info("Is Open", lambda: "Yes" if self.is_open() else "No")
-            info.add_info("Amount Outstanding", lambda: "{:f}".format(self.get_amount_outstanding()) + " " +
-                    self.get_pair().split('/')[0])
-            return info
+            return _build_info(self)
         def describe(self):
             """Print a description of this object to standard output."""
             print(self.info().format_multiline(), end="")
-        def __eq__(self, other):
-            return other is self
-        @property
-        @abstractmethod
-        def api(self):
-            """Get a reference to the ExchangeAPI object that was used to retrieve this order."""
-            pass
         def get_order_type(self):
             """Get the order type, "buy" or "sell".
 
@@ -364,9 +735,12 @@ class ExchangeAPI(ABC):
             Raises:
                 InsufficientInformationError: if the order pair is unknown
             """
-            pair = self.get_pair_or_none()
+            pair = self._pair
             if pair is None:
-                raise InsufficientInformationError("Order pair is unknown")
+                pair = self.get_pair_or_none()
+                if pair is None:
+                    raise InsufficientInformationError("Order pair is unknown")
+                self._pair = pair
             return pair
         @abstractmethod
         def get_pair_or_none(self):
@@ -418,6 +792,16 @@ class ExchangeAPI(ABC):
                 amount is unknown
             """
             pass
+        def get_amount_scaled(self):
+            """Get the amount, in the base currency, of this order as an integer multiple of the base currency's ULP.
+
+            Returns:
+                the amount of this order in units of the base currency's ULP
+            Raises:
+                InsufficientInformationError: if the order amount or pair is unknown
+                ValueError: if the order amount is not a whole multiple of the base currency's ULP
+            """
+            return self.api.get_pair_info(self.get_pair()).to_scaled_amount(self.get_amount())
         def get_total(self):
             """Get the amount, in the quote currency, that is currently outstanding on this order.
 
@@ -455,13 +839,35 @@ class ExchangeAPI(ABC):
             pass
         def get_amount_outstanding(self):
             """Get the amount, in the base currency, currently outstanding on this order."""
-            outstanding = self.get_amount()
-            for trade in self.get_trades():
-                outstanding -= trade.get_amount()
-            return outstanding
+            amount = self.get_amount_or_none()
+            if amount is None:
+                raise InsufficientInformationError("Order amount is unknown")
+            trade_amounts = [trade.get_amount_or_none() for trade in self.get_trades()]
+            if any(trade_amount is None for trade_amount in trade_amounts):
+                raise InsufficientInformationError("Trade amount is unknown")
+            with localcontext(_DECIMAL_CONTEXT):
+                return functools.reduce(operator.sub, trade_amounts, amount)
         def get_trades(self):
             """Return the result of self.api.get_order_trades(self)."""
             return self.api.get_order_trades(self)
+        @classmethod
+        def prefetch_trades(cls, orders):
+            """Retrieve the trades for several orders using as few requests as possible, by calling
+            api.get_orders_trades(...) once for each API from which the orders were retrieved. If the live cache of an
+            API is enabled, this should make subsequent calls to get_trades() on these orders cheap.
+
+            Args:
+                orders: an iterable of Order objects
+            Returns:
+                a dictionary mapping each of the orders to a list of Trade objects, as returned by get_trades()
+            """
+            by_api = {}
+            for order in orders:
+                by_api.setdefault(order.api, []).append(order)
+            trades = {}
+            for api, api_orders in by_api.items():
+                trades.update(api.get_orders_trades(api_orders))
+            return trades
         def cancel(self):
             """Cancel this order."""
             self.api.cancel_order(self)
@@ -473,6 +879,74 @@ class ExchangeAPI(ABC):
                 new_amount: the new amount for this order or None if the amount is not to be modified
             """
             self.api.modify_order(self, new_rate, new_amount)
+    def __init__(self):
+        # The queue used to coalesce asynchronous requests (see submit_async), created on first use
+        self._async_batch = None
+        # A tuple of the form (pairs, graph, hops, paths, adjacent) as returned by _get_exchange_graph(), or None if not
+        # yet built
+        self._exchange_graph_cache = None
+        # The dictionary returned by get_pairs() from which _exchange_graph_cache was last validated
+        self._exchange_graph_pairs = None
+        # The time, in seconds, for which get_value_of(...) may reuse the rate it found between two currencies while the
+        # live cache is enabled, or None if rates should not be reused
+        self.rate_cache_ttl = 15
+        # The rates found by get_value_of(...), mapping tuples of the form (from_currency, to_currency) to tuples of the
+        # form (expiry, rate) where expiry is a time.monotonic() time
+        self._rate_cache = {}
+        # The time, in seconds, for which get_volume_within(...) may reuse the public trades it retrieved for a time
+        # period while the live cache is enabled, or None if trades should not be reused
+        self.trade_history_cache_ttl = 15
+        # The public trades retrieved by get_volume_within(...), mapping tuples of the form (pair, start_time, end_time)
+        # to tuples of the form (expiry, index) where index is as returned by _get_trade_volume_index(...)
+        self._trade_history_cache = {}
+    def submit_async(self, request, pair=None, **kwargs):
+        """Submit a request for ticker data or an order book to be performed on a background thread.
+
+        Requests of the same kind that are outstanding at the same time are coalesced into a single call that fetches
+        the data for all pairs (eg. self.get_ticker(None)), so that many requests for individual pairs cost only one
+        round-trip to the exchange.
+
+        Only public market data may be requested this way: requests on behalf of the member (eg. for open orders) are
+        signed and ordered by nonce, and touch the trade and order pools, so they must be made from the caller's thread.
+        The background thread only reads public data and stores it in the caches with single dictionary operations.
+
+        Args:
+            request: the kind of request, 'ticker' or 'order_book'
+            pair: the pair for which the data is to be retrieved, or None to retrieve the data for all pairs
+            **kwargs: passed to the respective method (eg. depth for 'order_book')
+        Returns:
+            a concurrent.futures.Future which will hold the same result that a call to the respective method (eg.
+            self.get_ticker(pair)) would return, or the exception it would raise
+        """
+        if request not in ['ticker', 'order_book']:
+            raise ValueError("request must be 'ticker' or 'order_book'")
+        if self._async_batch is None:
+            # The batch only holds a weak reference to this object so that its background threads do not keep this
+            # object alive, and it is closed (without waiting) once this object is collected
+            self._async_batch = AsyncBatch(functools.partial(_execute_async_batch, weakref.ref(self)))
+            weakref.finalize(self, self._async_batch.close, False)
+        return self._async_batch.submit(request, (pair, kwargs))
+    def close_async(self):
+        """Stop the background threads used by submit_async(...), waiting for every request already submitted to be
+        performed. A later call to submit_async(...) will start them again."""
+        batch = self._async_batch
+        if batch is not None:
+            self._async_batch = None
+            batch.close()
+    def _execute_async_batch(self, request, args):
+        if request == 'ticker':
+            everything = self.get_ticker()
+        else: # request == 'order_book'
+            everything = self.get_order_book(depth=max(kwargs.get('depth', 10) for pair, kwargs in args))
+        results = []
+        for pair, kwargs in args:
+            if pair is None:
+                results.append(everything.copy())
+            elif pair in everything:
+                results.append(everything[pair])
+            else:
+                results.append(NonexistentPairError("Nonexistent currency pair '" + pair + "'"))
+        return results
     @abstractmethod
     def enable_live_cache(self):
         """Suggest that this object enable a cache which may cache any output received from the exchange API that
@@ -505,12 +979,30 @@ class ExchangeAPI(ABC):
     def get_pairs(self):
         """Get all pairs on the exchange and metadata about them.
 
+        While the live cache is enabled, implementations may return the same dictionary from every call (so that callers
+        can recognize an unchanged result by identity); it must not be modified.
+
         Returns:
             a dictionary mapping all pairs on the exchange to a PairInfo object with metadata about each respective pair
         Raises:
             ExchangeAPIError: if an error occurs
         """
         pass
+    def get_pair_info(self, pair):
+        """Get the metadata for a single pair on the exchange.
+
+        Args:
+            pair: a string representing the pair for which to get metadata
+        Returns:
+            a PairInfo object with metadata about the pair
+        Raises:
+            NonexistentPairError: if the pair is not present on the exchange
+            ExchangeAPIError: if another error occurs
+        """
+        pairs = self.get_pairs()
+        if pair not in pairs:
+            raise NonexistentPairError("Nonexistent currency pair '" + pair + "'")
+        return pairs[pair]
     @abstractmethod
     def get_ticker(self, pair=None):
         """Get a Ticker object describing the currenct ticker data for the specified pair or all pairs.
@@ -559,6 +1051,46 @@ class ExchangeAPI(ABC):
             ExchangeAPIError: if an error occurs
         """
         pass
+    def iter_public_trade_history(self, pair, start=None, end=None, page_seconds=None):
+        """Iterate over the history of all trades that have been made on this exchange for the specified pair during the
+        specified time period, optionally retrieving it one page (a shorter time period) at a time with
+        get_public_trade_history(...), so that the whole history never has to be held at once.
+
+        Each page costs a request to the exchange, so paging trades fewer requests for a smaller memory footprint; by
+        default the whole period is retrieved as a single page, just as by get_public_trade_history(...).
+
+        Implementations for exchanges with a native way of paginating trade history should override this method.
+
+        Args:
+            pair: a string representing the pair for which to get the public trade history
+            start: the number of seconds since the UNIX epoch since which the public trade history is to be retrieved
+                   or None to indicate 24 hours ago
+            end: the number of seconds since the UNIX epoch until which trade history is to be retrieved or None to
+                 indicate the end of trading history
+            page_seconds: the length, in seconds, of the time period covered by each page, or None to retrieve the
+                          whole period at once
+        Returns:
+            an iterator over all trades matching the specified parameters, in an undefined order within each page and
+            with pages in chronological order
+        Raises:
+            ExchangeAPIError: if an error occurs
+        """
+        if page_seconds is None:
+            yield from self.get_public_trade_history(pair, start, end)
+            return
+        if page_seconds < 1:
+            raise ValueError("page_seconds must be None or >= 1")
+        if start is None or end is None:
+            now = int(time.time())
+            if start is None:
+                start = now - 86400 # 24 hours ago
+            if end is None:
+                end = now
+        page_start = start
+        while page_start <= end:
+            page_end = min(page_start + page_seconds - 1, end)
+            yield from self.get_public_trade_history(pair, page_start, page_end)
+            page_start = page_end + 1
     @abstractmethod
     def get_trade_history(self, pair, start=None, end=None):
         """Get the history of the account holder's trades that have been made on this exchange for the specified pair
@@ -631,6 +1163,21 @@ class ExchangeAPI(ABC):
             ExchangeAPIError: if an error occurs
         """
         pass
+    def get_orders_trades(self, orders):
+        """Get the trades made to fill (or partially fill) each of several orders.
+
+        Implementations that can retrieve the trades for many orders with a single request to the exchange should
+        override this method; by default, get_order_trades(...) is called for each order.
+
+        Args:
+            orders: an iterable of Order objects
+        Returns:
+            a dictionary mapping each of the orders to a list of Trade objects, as would be returned by
+            get_order_trades(...) for that order
+        Raises:
+            ExchangeAPIError: if an error occurs
+        """
+        return {order: self.get_order_trades(order) for order in orders}
     @abstractmethod
     def place_buy_order(self, pair, rate, amount, account="exchange"):
         """Place a buy order defined by the specified pair, rate, amount, and account.
@@ -659,7 +1206,8 @@ class ExchangeAPI(ABC):
         pass
     @abstractmethod
     def cancel_order(self, order):
-        """Cancel the specified order.
+        """Cancel the specified order. To cancel more than one order, use cancel_orders(...), which may need fewer
+        requests to the exchange.
 
         Args:
             order: an Order object representing the order that is to be cancelled
@@ -669,7 +1217,8 @@ class ExchangeAPI(ABC):
         pass
     @abstractmethod
     def modify_order(self, order, new_rate=None, new_amount=None):
-        """Modify the specified order's rate and / or the order's amount.
+        """Modify the specified order's rate and / or the order's amount. To modify more than one order, use
+        modify_orders(...), which may need fewer requests to the exchange.
 
         Args:
             new_rate: the new rate for the order or None if the rate is not to be modified
@@ -678,7 +1227,51 @@ class ExchangeAPI(ABC):
             ExchangeAPIError: if an error occurs
         """
         pass
-    def get_volume_within(self, pair, start_time, end_time, min_rate, max_rate):
+    def cancel_orders(self, orders):
+        """Cancel each of several orders.
+
+        Implementations for exchanges that can cancel many orders with a single request should override this method;
+        by default, cancel_order(...) is called for each order.
+
+        Args:
+            orders: an iterable of Order objects representing the orders that are to be cancelled
+        Raises:
+            ExchangeAPIError: if an error occurs, in which case some of the orders may have been cancelled
+        """
+        for order in orders:
+            self.cancel_order(order)
+    def modify_orders(self, modifications):
+        """Modify each of several orders.
+
+        Implementations for exchanges that can modify many orders with a single request should override this method;
+        by default, modify_order(...) is called for each order.
+
+        Args:
+            modifications: an iterable of tuples of the form (order, new_rate, new_amount), where each element is
+                           passed to modify_order(...) as the argument of the same name
+        Raises:
+            ExchangeAPIError: if an error occurs, in which case some of the orders may have been modified
+        """
+        for order, new_rate, new_amount in modifications:
+            self.modify_order(order, new_rate=new_rate, new_amount=new_amount)
+    def cancel_all_orders(self, pair=None):
+        """Cancel all outstanding (open) orders by the exchange member for the specified pair or all pairs.
+
+        Args:
+            pair: a string representing the pair for which all open orders are to be cancelled or None to cancel the
+                  open orders for all pairs
+        Returns:
+            a list of Order objects representing the orders that were cancelled
+        Raises:
+            ExchangeAPIError: if an error occurs, in which case some of the orders may have been cancelled
+        """
+        if pair is not None:
+            orders = list(self.get_open_orders(pair))
+        else:
+            orders = [order for open_orders in self.get_open_orders().values() for order in open_orders]
+        self.cancel_orders(orders)
+        return orders
+    def get_volume_within(self, pair, start_time, end_time, min_rate, max_rate, page_seconds=None):
         """Get the total volume of all trades executed for the specified pair during a specified time period and rate
         range.
 
@@ -689,7 +1282,10 @@ class ExchangeAPI(ABC):
             end_time: the number of seconds since the UNIX epoch that represents the end of the time period for
                       which volume is to be queried
             min_rate: the minimum rate, in the quote currency, of a trade that should be included in the results
-            max_rate: the maximum rate, in the quote currency, of a trade that should be included in the results
+            max_rate: the maximum rate, in the quote currency, of a trade that should be included in the results, which
+                      may be infinite
+            page_seconds: passed to iter_public_trade_history(...); None (the default) retrieves the trades with a
+                          single request, while a page size bounds the memory used at the cost of one request per page
         Returns:
             a tuple of the form (base_volume, quote_volume) where the base_volume is the total volume of the base
             currency exchanged in trades that matched the specified parameters and quote_volume is the total volume the
@@ -703,21 +1299,66 @@ class ExchangeAPI(ABC):
         max_rate = Decimal(max_rate)
         if max_rate < min_rate:
             raise ValueError("max_rate must be >= min_rate")
-        base_volume = Decimal(0)
-        quote_volume = Decimal(0)
-        for trade in self.get_public_trade_history(pair, start_time, end_time):
-            if min_rate is not None and trade.get_rate() < min_rate:
-                continue
-            if max_rate is not None and trade.get_rate() > max_rate:
-                continue
-            base_volume += trade.get_amount()
-            quote_volume += trade.get_total()
+        base_volume = _DECIMAL_ZERO
+        quote_volume = _DECIMAL_ZERO
+        # Callers often query several rate ranges over the same time period, so while the live cache is enabled the
+        # trades retrieved for that period are kept, sorted by rate with running totals, for up to
+        # trade_history_cache_ttl seconds; each query then only needs two binary searches
+        if self.is_live_cache_enabled() and self.trade_history_cache_ttl is not None:
+            rates, cumulative_amounts, cumulative_totals = self._get_trade_volume_index(pair, start_time, end_time,
+                    page_seconds)
+            lo = bisect.bisect_left(rates, min_rate)
+            hi = bisect.bisect_right(rates, max_rate, lo)
+            with localcontext(_DECIMAL_CONTEXT):
+                return cumulative_amounts[hi] - cumulative_amounts[lo], cumulative_totals[hi] - cumulative_totals[lo]
+        with localcontext(_DECIMAL_CONTEXT):
+            if min_rate == 0 and max_rate.is_infinite():
+                # Every trade matches, so the rates need not be retrieved at all
+                for trade in self.iter_public_trade_history(pair, start_time, end_time, page_seconds):
+                    base_volume += trade.get_amount()
+                    quote_volume += trade.get_total()
+                return base_volume, quote_volume
+            for trade in self.iter_public_trade_history(pair, start_time, end_time, page_seconds):
+                rate = trade.get_rate()
+                if rate < min_rate or rate > max_rate:
+                    continue
+                base_volume += trade.get_amount()
+                quote_volume += trade.get_total()
         return base_volume, quote_volume
-    def get_exchange_path(self, from_currency, to_currency):
+    def _get_trade_volume_index(self, pair, start_time, end_time, page_seconds=None):
+        """Get an index of the rates, amounts and totals of all public trades made for a pair during a time period,
+        reusing the one built by an earlier call for the same period if it is less than trade_history_cache_ttl seconds
+        old.
+
+        Returns:
+            a tuple of the form (rates, cumulative_amounts, cumulative_totals), where rates is a tuple of the rates of
+            the trades in ascending order, and the ith element of cumulative_amounts and of cumulative_totals is the
+            total amount and total of the first i trades in that order (so each has one more element than rates)
+        """
+        key = (pair, start_time, end_time)
+        cached = self._trade_history_cache.get(key)
+        if cached is not None and time.monotonic() < cached[0]:
+            return cached[1]
+        rows = [(trade.get_rate(), trade.get_amount(), trade.get_total())
+                for trade in self.iter_public_trade_history(pair, start_time, end_time, page_seconds)]
+        rows.sort(key=operator.itemgetter(0))
+        rates, amounts, totals = tuple(zip(*rows)) if rows else ((), (), ())
+        with localcontext(_DECIMAL_CONTEXT):
+            index = (rates, tuple(itertools.accumulate(itertools.chain((_DECIMAL_ZERO,), amounts))),
+                    tuple(itertools.accumulate(itertools.chain((_DECIMAL_ZERO,), totals))))
+        # Keep only the most recently retrieved time periods, since each may hold many trades
+        self._trade_history_cache.pop(key, None)
+        while len(self._trade_history_cache) >= _TRADE_HISTORY_CACHE_SIZE:
+            del self._trade_history_cache[next(iter(self._trade_history_cache))]
+        self._trade_history_cache[key] = (time.monotonic() + self.trade_history_cache_ttl, index)
+        return index
+    def get_exchange_path(self, from_currency, to_currency, mode='hops'):
         """Get a "path" that can be taken in order to exchange one currency for another. This is useful if there is no
         pair on the exchange that supports trading of one currency for another, but there is an indirect way to achieve
-        that result. This method will always find one of the paths that involves the fewest number of trades (the fewest
-        number of pairs).
+        that result. In 'hops' mode, this method will always find one of the paths that involves the fewest number of
+        trades (the fewest number of pairs). In 'best_rate' mode, it instead finds a path that maximizes the product of
+        the last trade rates of the trades along it (ie. the estimated amount of to_currency obtained for each unit of
+        from_currency, ignoring fees), which may involve more trades.
 
         For example, with a from_currency of 'XMR' and a to_currency of 'DCR', one possible exchange path may be:
 
@@ -729,6 +1370,7 @@ class ExchangeAPI(ABC):
                            to_currency
             to_currency: the currency that is desired to be bought for from_currency, indirectly; may not be equal to
                          from_currency
+            mode: 'hops' or 'best_rate'
         Returns:
             a list of tuples of the form (order_type, pair) where order_type is 'buy' or 'sell' and pair is the pair to
             be bought or sold; buying or selling the respective pairs in the order returned indirectly achieves the
@@ -738,35 +1380,126 @@ class ExchangeAPI(ABC):
         """
         if from_currency == to_currency:
             raise ValueError("from_currency may not be equal to to_currency")
-        pairs = set(self.get_pairs().keys())
-        g = Graph()
-        for pair in pairs:
-            base, quote = pair.split('/')
-            g.add_node(base)
-            g.add_node(quote)
-            g.add_edge(base, quote)
+        if mode not in ('hops', 'best_rate'):
+            raise ValueError("mode must be 'hops' or 'best_rate'")
+        pairs, g, hops, paths, adjacent = self._get_exchange_graph()
+        if mode == 'best_rate':
+            if not g.has_node(from_currency):
+                raise NonexistentCurrencyError("Nonexistent currency '" + from_currency + "'")
+            if not g.has_node(to_currency):
+                raise NonexistentCurrencyError("Nonexistent currency '" + to_currency + "'")
+            return self._best_rate_path(from_currency, to_currency, hops)
+        pair_path = paths.get((from_currency, to_currency))
+        if pair_path is not None:
+            return list(pair_path)
+        # A pair between the two currencies is always one of the shortest paths, and needs no search
+        hop = hops.get((from_currency, to_currency))
+        if hop is not None:
+            return [hop]
         if not g.has_node(from_currency):
             raise NonexistentCurrencyError("Nonexistent currency '" + from_currency + "'")
         if not g.has_node(to_currency):
             raise NonexistentCurrencyError("Nonexistent currency '" + to_currency + "'")
         try:
-            path = g.shortest_path(from_currency, to_currency)
+            path = g.bidirectional_shortest_path(from_currency, to_currency)
         except NoSuchPath:
             raise ExchangeAPIError("No exchange path exists from '" + from_currency + "' to '" + to_currency + "'")
-        pair_path = []
-        for i in range(len(path) - 1):
-            if path[i] + '/' + path[i + 1] in pairs:
-                pair_path.append(('sell', path[i] + '/' + path[i + 1]))
-            else:
-                pair_path.append(('buy', path[i + 1] + '/' + path[i]))
+        pair_path = [hops[edge] for edge in zip(path, path[1:])]
+        paths[(from_currency, to_currency)] = tuple(pair_path)
         return pair_path
-    def get_value_of(self, amount, from_currency, to_currency):
+    def _best_rate_path(self, from_currency, to_currency, hops):
+        """Find an exchange path from from_currency to to_currency that maximizes the product of the rates of its hops,
+        using the current ticker.
+
+        This is a shortest path search where each hop has a weight of -log(rate), which is negative for rates above 1,
+        so Bellman-Ford relaxation is used rather than Dijkstra's algorithm. Since a cycle with a combined rate above 1
+        would have a negative weight, each candidate path is kept explicitly and never extended to a currency it already
+        visits, so the path found never contains a cycle.
+
+        Args:
+            from_currency: the currency to be sold
+            to_currency: the currency to be bought
+            hops: the hops of the exchange graph, as returned by _get_exchange_graph()
+        Returns:
+            the exchange path, in the same format as get_exchange_path(...)
+        """
+        ticker = self.get_ticker()
+        weights = {}
+        for edge, (order_type, pair) in hops.items():
+            if pair not in ticker or ticker[pair].last <= 0:
+                continue
+            log_last = math.log(ticker[pair].last)
+            weights[edge] = -log_last if order_type == 'sell' else log_last
+        # Maps each currency reached so far to a tuple of the form (weight, path) where path is a tuple of currencies
+        best = {from_currency: (0.0, (from_currency,))}
+        for i in range(len(hops)):
+            updated = best.copy()
+            for (node_a, node_b), weight in weights.items():
+                if node_a not in best:
+                    continue
+                distance, path = best[node_a]
+                if node_b in path:
+                    continue
+                if node_b not in updated or distance + weight < updated[node_b][0]:
+                    updated[node_b] = (distance + weight, path + (node_b,))
+            if updated == best:
+                break
+            best = updated
+        if to_currency not in best:
+            raise ExchangeAPIError("No exchange path exists from '" + from_currency + "' to '" + to_currency + "'")
+        path = best[to_currency][1]
+        return [hops[edge] for edge in zip(path, path[1:])]
+    def _get_exchange_graph(self):
+        """Get the graph of the currencies on the exchange, in which there is an edge between every two currencies that
+        form a pair. The graph is only rebuilt when the set of pairs returned by get_pairs() changes.
+
+        Returns:
+            a tuple of the form (pairs, graph, hops, paths, adjacent) where pairs is a frozenset of all pairs on the
+            exchange, graph is the Graph of currencies, hops is a dictionary mapping tuples of the form (from_currency,
+            to_currency) for every two adjacent currencies to the tuple of the form (order_type, pair) that exchanges
+            one for the other, paths is a dictionary mapping tuples of the form (from_currency, to_currency) to the
+            exchange paths already found between them, which is discarded along with the graph, and adjacent is a
+            dictionary mapping each currency to a list of tuples of the form (currency, pair, is_base) for each
+            adjacent currency, in sorted order, where pair is the pair in hops that exchanges the two and is_base is
+            True if the currency whose list it is is the base currency of that pair
+        """
+        pairs_dict = self.get_pairs()
+        cached = self._exchange_graph_cache
+        if cached is not None and pairs_dict is self._exchange_graph_pairs:
+            return cached
+        self._exchange_graph_pairs = pairs_dict
+        pairs = frozenset(pairs_dict)
+        if cached is not None and cached[0] == pairs:
+            return cached
+        g = Graph()
+        hops = {}
+        for pair in pairs:
+            base, quote = _split_pair(pair)
+            g.add_node(base)
+            g.add_node(quote)
+            g.add_edge(base, quote)
+            hops[base, quote] = ('sell', pair)
+            # If both base/quote and quote/base exist, selling is preferred, as before
+            hops.setdefault((quote, base), ('buy', pair))
+        adjacent = {}
+        for (from_currency, to_currency), (order_type, pair) in sorted(hops.items()):
+            adjacent.setdefault(from_currency, []).append((to_currency, pair, order_type == 'sell'))
+        self._exchange_graph_cache = (pairs, g, hops, {}, adjacent)
+        return self._exchange_graph_cache
+    def get_value_of(self, amount, from_currency, to_currency, ticker=None, path=None):
         """Estimate the value of the specified amount of one currency in another currency.
 
+        Callers valuing many amounts at once can fetch the ticker (and any exchange paths) themselves and pass them in,
+        so that they are not fetched again for every call.
+
         Args:
             amount: the amount, in from_currency, to be valued
             from_currency: the currency in which amount is quoted
             to_currency: the currency in which the value of the specified funds are to be estimated
+            ticker: the dictionary mapping pairs to Ticker objects to value the funds with, as returned by
+                    get_ticker(), or None to use the current ticker
+            path: the exchange path from from_currency to to_currency, as returned by get_exchange_path(...), or None
+                  to use get_exchange_path(from_currency, to_currency)
         Returns:
             the estimated value of the specified funds quoted in to_currency
         Raises:
@@ -774,22 +1507,30 @@ class ExchangeAPI(ABC):
         """
         if from_currency == to_currency:
             return Decimal(str(amount))
+        if ticker is not None:
+            if path is None:
+                path = self.get_exchange_path(from_currency, to_currency)
+            return Decimal(str(amount)) * _path_rate(path, ticker)
+        # Enabling the live cache accepts results that are not up to the minute, so while it is enabled the rate between
+        # the two currencies is reused for up to rate_cache_ttl seconds
         cache = self.is_live_cache_enabled()
+        reuse_rate = cache and path is None and self.rate_cache_ttl is not None
+        if reuse_rate:
+            cached = self._rate_cache.get((from_currency, to_currency))
+            if cached is not None and time.monotonic() < cached[0]:
+                return Decimal(str(amount)) * cached[1]
         if not cache:
             self.enable_live_cache()
         try:
-            path = self.get_exchange_path(from_currency, to_currency)
-            ticker = self.get_ticker()
-            value = Decimal(str(amount))
-            for trade in path:
-                if trade[0] == 'buy':
-                    value /= ticker[trade[1]].last
-                else:
-                    value *= ticker[trade[1]].last
+            if path is None:
+                path = self.get_exchange_path(from_currency, to_currency)
+            rate = _path_rate(path, self.get_ticker())
         finally:
             if not cache:
                 self.disable_live_cache()
-        return value
+        if reuse_rate:
+            self._rate_cache[(from_currency, to_currency)] = (time.monotonic() + self.rate_cache_ttl, rate)
+        return Decimal(str(amount)) * rate
     def get_valuation(self, quote_currency, currency=None, availability='all', *args, **kwargs):
         """Return the same results as a call to self.get_balance(currency, availability, *args, **kwargs), but quote all
         returned values in quote_currency (this value is an estimation).
@@ -810,8 +1551,14 @@ class ExchangeAPI(ABC):
         try:
             if currency is None:
                 valuations = self.get_balance(currency, availability, *args, **kwargs)
+                ticker = self.get_ticker()
+                rates = self._rate_table(quote_currency, ticker)
                 for c in valuations:
-                    valuations[c] = self.get_value_of(valuations[c], c, quote_currency)
+                    rate = rates.get(c)
+                    if rate is not None:
+                        valuations[c] = Decimal(str(valuations[c])) * rate
+                    else:
+                        valuations[c] = self.get_value_of(valuations[c], c, quote_currency, ticker=ticker)
                 return valuations
             else:
                 valuation = self.get_balance(currency, availability, *args, **kwargs)
@@ -820,3 +1567,130 @@ class ExchangeAPI(ABC):
         finally:
             if not cache:
                 self.disable_live_cache()
+    def _rate_table(self, quote_currency, ticker):
+        """Estimate the value, in quote_currency, of one unit of every currency from which there is an exchange path to
+        quote_currency, using a single breadth-first search from quote_currency over the pairs on the exchange. Each
+        currency is valued along one of the exchange paths involving the fewest pairs, like get_value_of(...).
+
+        Args:
+            quote_currency: the currency in which the rates are to be quoted
+            ticker: a dictionary mapping pairs to Ticker objects, as returned by get_ticker()
+        Returns:
+            a dictionary mapping currencies to their estimated values, as Decimals, in quote_currency; currencies with
+            no exchange path to quote_currency (ignoring pairs whose last rate is not positive) are omitted
+        """
+        pairs, g, hops, paths, adjacent = self._get_exchange_graph()
+        rates = {quote_currency: Decimal(1)}
+        queue = deque((quote_currency,))
+        while queue:
+            current = queue.popleft()
+            for neighbor, pair, is_base in adjacent.get(current, ()):
+                if neighbor in rates or pair not in ticker or ticker[pair].last <= 0:
+                    continue
+                if is_base:
+                    # One unit of neighbor buys 1 / last units of current
+                    rates[neighbor] = rates[current] / ticker[pair].last
+                else:
+                    # One unit of neighbor sells for last units of current
+                    rates[neighbor] = rates[current] * ticker[pair].last
+                queue.append(neighbor)
+        return rates
+
+class LiveCacheMixin:
+    """A mixin for ExchangeAPI implementations which provides the live cache.
+
+    Implementations store the results of calls that change over time under a hashable key using _cached(...) (or the
+    lower level _live_cache_get(...) and _live_cache_put(...)), which only caches anything while the live cache is
+    enabled. Each entry expires after the TTL given to enable_live_cache(...), if any.
+
+    If a maximum TTL is also given, the TTL of each key adapts to how often its value changes: every time an expired
+    entry is refreshed with a value equal to the previous one, the TTL for that key doubles (up to the maximum), and as
+    soon as the value changes it falls back to the base TTL. Results that rarely change (eg. the ticker of a quiet pair)
+    are then fetched far less often, while those that change often are still refreshed after the base TTL.
+    """
+    def __init__(self):
+        super().__init__()
+        # The live cache, mapping keys to tuples of the form (expiry, value, streak) where expiry is a time.monotonic()
+        # time or None if the entry does not expire, and streak is the number of consecutive times the entry was
+        # refreshed without its value changing. Expired entries are kept until they are refreshed so that the new
+        # value can be compared with the old one. Set to None if disabled.
+        self._live_cache = None
+        self._live_cache_ttl = None
+        self._live_cache_max_ttl = None
+        # Held while the live cache is modified, since results fetched by submit_async(...) are cached from a background
+        # thread while the caller may enable, disable or clear the cache
+        self._live_cache_lock = threading.Lock()
+    def enable_live_cache(self, ttl=None, max_ttl=None):
+        """Enable the live cache, or change its TTLs if it is already enabled.
+
+        Args:
+            ttl: the time, in seconds, for which each cached result remains valid, or None if results should remain
+                 valid until the cache is cleared or disabled
+            max_ttl: the time, in seconds, up to which the TTL of a result that does not change between refreshes may
+                     grow, or None if the TTL should not adapt
+        """
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be None or > 0")
+        if max_ttl is not None:
+            if ttl is None:
+                raise ValueError("max_ttl must be None if ttl is None")
+            if max_ttl < ttl:
+                raise ValueError("max_ttl must be None or >= ttl")
+        with self._live_cache_lock:
+            if self._live_cache is None:
+                self._live_cache = {}
+            self._live_cache_ttl = ttl
+            self._live_cache_max_ttl = max_ttl
+    def disable_live_cache(self):
+        with self._live_cache_lock:
+            self._live_cache = None
+        self._rate_cache.clear()
+        self._trade_history_cache.clear()
+    def clear_live_cache(self):
+        with self._live_cache_lock:
+            if self._live_cache is not None:
+                self._live_cache.clear()
+        self._rate_cache.clear()
+        self._trade_history_cache.clear()
+    def is_live_cache_enabled(self):
+        return self._live_cache is not None
+    def _live_cache_get(self, key):
+        """Return the value cached under key, or None if the live cache is disabled or there is no unexpired value."""
+        cache = self._live_cache
+        if cache is None:
+            return None
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        expiry, value, streak = entry
+        if expiry is not None and time.monotonic() >= expiry:
+            return None
+        return value
+    def _live_cache_put(self, key, value):
+        """Cache value under key if the live cache is enabled."""
+        with self._live_cache_lock:
+            if self._live_cache is None:
+                return
+            ttl = self._live_cache_ttl
+            streak = 0
+            if self._live_cache_max_ttl is not None:
+                previous = self._live_cache.get(key)
+                if previous is not None and previous[1] == value:
+                    streak = previous[2]
+                    if ttl * 2 ** streak < self._live_cache_max_ttl:
+                        streak += 1
+                    ttl = min(ttl * 2 ** streak, self._live_cache_max_ttl)
+            expiry = time.monotonic() + ttl if ttl is not None else None
+            self._live_cache[key] = (expiry, value, streak)
+    def _live_cache_discard(self, key):
+        """Remove the value cached under key, if any."""
+        with self._live_cache_lock:
+            if self._live_cache is not None:
+                self._live_cache.pop(key, None)
+    def _cached(self, key, fn):
+        """Return the value cached under key or, if there is none, call fn() and cache and return its result."""
+        value = self._live_cache_get(key)
+        if value is None:
+            value = fn()
+            self._live_cache_put(key, value)
+        return value
@@ -19,13 +19,22 @@
 #    misrepresented as being the original software.
 # 3. This notice may not be removed or altered from any source distribution.
 
+import bisect
 import calendar
-from decimal import Decimal
+from decimal import Decimal, ROUND_CEILING
+import functools
 import hashlib
 import hmac
+import http.client
+import io
+import itertools
 import json
+import operator
 import re
+import sys
+import threading
 import time
+import urllib.error
 import urllib.parse
 import urllib.request
 
@@ -37,71 +46,221 @@ __all__ = [
     'PoloniexAPI'
 ]
 
-# The minimum time delay, in seconds, between requests to the Poloniex API
-_REQUEST_DELAY = 0.25
+# The maximum long term rate, in requests per second, at which requests are sent to Poloniex, and the number of requests
+# that may be sent at once after a pause; at most 6 requests are sent in any one second
+_REQUEST_RATE = 4
+_REQUEST_BURST = 2
+# The User-Agent header sent with every request, the same as the one urllib.request.urlopen(...) sends
+_USER_AGENT = 'Python-urllib/%d.%d' % sys.version_info[:2]
+# The maximum number of URLs for which the ETag and parsed body of the last response are kept
+_ETAG_CACHE_SIZE = 32
+# The size, in bytes, of the largest response body whose parsed form is kept for reuse when the server answers 304 Not
+# Modified; larger responses (eg. every order book at once) are always retrieved in full
+_ETAG_MAX_BODY = 256 * 1024
+# The time, in seconds, after which a connection attempt or a read from the server is abandoned
+_REQUEST_TIMEOUT = 30
+# The time, in seconds, for which a kept-alive connection may sit idle and still be used for a request that can't be
+# safely retried (a trading API POST); servers close idle connections after a while, so an older connection is
+# replaced up front rather than risking a failure partway through such a request
+_MAX_IDLE_FOR_UNSAFE = 5
 
 _PAIR_REGEXP = re.compile(r"^[A-Z]+/[A-Z]+$")
 _CURRENCY_REGEXP = re.compile(r"^[A-Z]+$")
 _POLONIEX_ULP = Decimal("0.00000001")
+_DECIMAL_ZERO = Decimal(0)
+
+# The pairs which have already been validated by _validate_pair(...), so that the regular expression need only be
+# matched once for each pair
+_VALID_PAIRS = set()
+
+def _validate_pair(pair, allow_none=False):
+    if pair is None and allow_none:
+        return
+    if not isinstance(pair, str):
+        raise TypeError("pair must be None or of type str" if allow_none else "pair must be of type str")
+    if pair not in _VALID_PAIRS:
+        if _PAIR_REGEXP.match(pair) is None:
+            raise ValueError("Malformed pair")
+        _VALID_PAIRS.add(pair)
+
+# The currencies which have already been validated by _validate_currency(...), for the same reason
+_VALID_CURRENCIES = set()
+
+def _validate_currency(currency, allow_none=False):
+    if currency is None and allow_none:
+        return
+    if not isinstance(currency, str):
+        raise ValueError("currency must be None or of type str" if allow_none else "currency must be of type str")
+    if currency not in _VALID_CURRENCIES:
+        if _CURRENCY_REGEXP.match(currency) is None:
+            raise ValueError("Malformed currency")
+        _VALID_CURRENCIES.add(currency)
 
 def _round_ceil_ulp(n):
-    if n % _POLONIEX_ULP == 0:
-        return Decimal(int(n / _POLONIEX_ULP)) * _POLONIEX_ULP
-    return Decimal(int((n - n % _POLONIEX_ULP) / _POLONIEX_ULP) + 1) * _POLONIEX_ULP
+    return n.quantize(_POLONIEX_ULP, rounding=ROUND_CEILING)
+
+# Rates and amounts arrive as strings, and the same strings (common price ticks, round amounts) recur heavily across
+# tickers, trades, orders and balances, so parsing them is memoized; Decimals are immutable, so sharing them is safe
+
+@functools.lru_cache(maxsize=4096)
+def _to_decimal(s):
+    return Decimal(s)
 
+# Rates and amounts sent with orders are formatted in fixed-point notation; bots tend to place orders at the same few
+# rates and amounts over and over, so the formatting is memoized too. Equal Decimals share one cache entry even if their
+# exponents differ (eg. 0.5 and 0.50), which is fine since both strings denote the same value.
+
+@functools.lru_cache(maxsize=1024)
+def _format_decimal(n):
+    return format(n, 'f')
+
+def _as_decimal(n):
+    # User-supplied numbers go through str(...) so that floats keep their shortest representation (eg. 0.1 rather than
+    # its exact binary value), but Decimals and strings can be used (or parsed) as they are
+    if type(n) is Decimal:
+        return n
+    return Decimal(n if isinstance(n, str) else str(n))
+
+# There are only a few hundred pairs, but pairs are encoded and decoded for nearly every request and every trade or
+# order parsed, so both conversions are memoized
+
+@functools.lru_cache(maxsize=1024)
 def _encode_pair(pair):
     base, quote = pair.split('/')
     return quote + '_' + base
 
+@functools.lru_cache(maxsize=1024)
 def _decode_pair(pair):
     quote, base = pair.split('_')
-    return base + '/' + quote
+    return sys.intern(base + '/' + quote)
 
 def _decode_timestamp(timestamp):
-    return calendar.timegm(time.strptime(timestamp, '%Y-%m-%d %H:%M:%S'))
+    # Timestamps are always in the fixed-width format 'YYYY-MM-DD HH:MM:SS' (in UTC), so the fields are sliced out
+    # directly, which is several times faster than time.strptime(...)
+    return calendar.timegm((int(timestamp[0:4]), int(timestamp[5:7]), int(timestamp[8:10]), int(timestamp[11:13]),
+            int(timestamp[14:16]), int(timestamp[17:19]), 0, 0, 0))
+
+def _parse_order_book(raw_order_book):
+    return api.OrderBook.from_raw(raw_order_book['bids'], raw_order_book['asks'])
+
+def _parse_ticker(raw_ticker):
+    ticker = {}
+    for raw_pair, raw in raw_ticker.items():
+        ticker[_decode_pair(raw_pair)] = api.Ticker(highest_bid=_to_decimal(raw['highestBid']),
+                lowest_ask=_to_decimal(raw['lowestAsk']),
+                last=_to_decimal(raw['last']),
+                base_volume=_to_decimal(raw['baseVolume']),
+                quote_volume=_to_decimal(raw['quoteVolume']),
+                percent_change=_to_decimal(raw['percentChange']))
+    return ticker
+
+def _pairs_from_ticker(ticker):
+    pair_info = api.PairInfo(base_ulp=_POLONIEX_ULP, quote_ulp=_POLONIEX_ULP)
+    return {pair: pair_info for pair in ticker}
+
+# The functions below yield the (currency, amount) pairs in a balances response; a currency may be yielded more than
+# once (once per account), in which case its amounts are summed
+
+def _extract_total_balances(response):
+    for c, raw in response.items():
+        yield c, _to_decimal(raw['available']) + _to_decimal(raw['onOrders'])
+
+def _extract_on_order_balances(response):
+    for c, raw in response.items():
+        yield c, _to_decimal(raw['onOrders'])
+
+def _extract_available_balances(response, account=None):
+    for a in (response if account is None else (account,)):
+        for c, raw in response[a].items():
+            yield c, _to_decimal(raw)
+
+# Maps each supported (availability, account) combination to the trading API command and arguments used to get those
+# balances, and the function which extracts them from the response
+_BALANCE_QUERIES = {
+    ('all', 'all'): ('returnCompleteBalances', {'account': 'all'}, _extract_total_balances),
+    ('all', 'exchange'): ('returnCompleteBalances', {}, _extract_total_balances),
+    ('available', 'all'): ('returnAvailableAccountBalances', {}, _extract_available_balances),
+    ('available', 'exchange'): ('returnAvailableAccountBalances', {'account': 'exchange'},
+            functools.partial(_extract_available_balances, account='exchange')),
+    ('available', 'margin'): ('returnAvailableAccountBalances', {'account': 'margin'},
+            functools.partial(_extract_available_balances, account='margin')),
+    ('available', 'lending'): ('returnAvailableAccountBalances', {'account': 'lending'},
+            functools.partial(_extract_available_balances, account='lending')),
+    ('on_order', 'all'): ('returnCompleteBalances', {'account': 'all'}, _extract_on_order_balances),
+    ('on_order', 'exchange'): ('returnCompleteBalances', {}, _extract_on_order_balances),
+}
+
+def _new_trade_history_cache(start, end, trades):
+    # Besides the cached trades keyed by their global trade IDs, the trades are kept sorted by timestamp, with their
+    # timestamps in a parallel list, so that the trades within a time period can be found by binary search
+    cached = {'times_cached': IntRanges((start, end)), 'trades': {}, 'timestamps': [], 'by_time': []}
+    _add_to_trade_history_cache(cached, trades)
+    return cached
+
+def _add_to_trade_history_cache(cached, trades):
+    # Keying by the global trade ID hashes a plain int rather than calling Trade.__hash__(...) for every trade
+    cached_trades = cached['trades']
+    new_trades = {trade.global_trade_id: trade for trade in trades if trade.global_trade_id not in cached_trades}
+    if len(new_trades) == 0:
+        return
+    cached_trades.update(new_trades)
+    entries = list(zip(cached['timestamps'], cached['by_time']))
+    entries.extend((trade.get_timestamp(), trade) for trade in new_trades.values())
+    # Both runs are already sorted (or nearly so), which list.sort(...) merges in linear time
+    entries.sort(key=operator.itemgetter(0))
+    cached['timestamps'] = [entry[0] for entry in entries]
+    cached['by_time'] = [entry[1] for entry in entries]
+
+def _cached_trades_within(cached, start, end):
+    lo = bisect.bisect_left(cached['timestamps'], start)
+    hi = bisect.bisect_right(cached['timestamps'], end, lo)
+    return cached['by_time'][lo:hi]
+
+class _TradeRecord:
+    # The fields of a single trade, each of which is None while it is unknown; a record with slots takes a fraction of
+    # the memory of a dict, and its fields are read with a single attribute load
+    __slots__ = ('trade_type', 'pair', 'rate', 'amount', 'total', 'fee', 'timestamp', 'trade_id', 'order')
+    def __init__(self):
+        self.trade_type = None
+        self.pair = None
+        self.rate = None
+        self.amount = None
+        self.total = None
+        self.fee = None
+        self.timestamp = None
+        self.trade_id = None
+        self.order = None
 
 class OrderNotFoundError(api.ExchangeAPIError):
     pass
 
-class PoloniexAPI(api.ExchangeAPI):
+class PoloniexAPI(api.LiveCacheMixin, api.ExchangeAPI):
     class Trade(api.ExchangeAPI.Trade):
+        __slots__ = ('_global_trade_id', '_record')
         def __init__(self, api, global_trade_id):
-            self._api = api
+            super().__init__(api)
             self._global_trade_id = global_trade_id
+            # The fields of this trade, shared with the persistent cache
+            self._record = api._persistent_cache['trades'].get(global_trade_id)
+            if self._record is None:
+                self._record = api._persistent_cache['trades'][global_trade_id] = _TradeRecord()
         # Definitions of abstract methods
-        @property
-        def api(self):
-            return self._api
         def get_trade_type_or_none(self):
-            if 'trade_type' in self._api._persistent_cache['trades'][self._global_trade_id]:
-                return self._api._persistent_cache['trades'][self._global_trade_id]['trade_type']
-            return None
+            return self._record.trade_type
         def get_pair_or_none(self):
-            if 'pair' in self._api._persistent_cache['trades'][self._global_trade_id]:
-                return self._api._persistent_cache['trades'][self._global_trade_id]['pair']
-            return None
+            return self._record.pair
         def get_rate_or_none(self):
-            if 'rate' in self._api._persistent_cache['trades'][self._global_trade_id]:
-                return self._api._persistent_cache['trades'][self._global_trade_id]['rate']
-            return None
+            return self._record.rate
         def get_amount_or_none(self):
-            if 'amount' in self._api._persistent_cache['trades'][self._global_trade_id]:
-                return self._api._persistent_cache['trades'][self._global_trade_id]['amount']
-            return None
+            return self._record.amount
         def get_total_or_none(self):
-            if 'total' in self._api._persistent_cache['trades'][self._global_trade_id]:
-                return self._api._persistent_cache['trades'][self._global_trade_id]['total']
-            return None
+            return self._record.total
         def get_fee_or_none(self):
             # TODO It appears as though Poloniex lists the fee in the base currency when buying and the quote currency
             # when selling. This should be accounted for.
-            if 'fee' in self._api._persistent_cache['trades'][self._global_trade_id]:
-                return self._api._persistent_cache['trades'][self._global_trade_id]['fee']
-            return None
+            return self._record.fee
         def get_timestamp_or_none(self):
-            if 'timestamp' in self._api._persistent_cache['trades'][self._global_trade_id]:
-                return self._api._persistent_cache['trades'][self._global_trade_id]['timestamp']
-            return None
+            return self._record.timestamp
         # Subclass specific methods
         def __hash__(self):
             return hash(self._global_trade_id)
@@ -114,61 +273,49 @@ class PoloniexAPI(api.ExchangeAPI):
                 raise api.InsufficientInformationError("Trade ID is unknown")
             return trade_id
         def get_trade_id_or_none(self):
-            if 'trade_id' in self._api._persistent_cache['trades'][self._global_trade_id]:
-                return self._api._persistent_cache['trades'][self._global_trade_id]['trade_id']
-            return None
+            return self._record.trade_id
         def get_order(self):
             order = self.get_order_or_none()
             if order is None:
                 raise api.InsufficientInformationError("Order handle is unavailable")
             return order
         def get_order_or_none(self):
-            if 'order' in self._api._persistent_cache['trades'][self._global_trade_id]:
-                return self._api._persistent_cache['trades'][self._global_trade_id]['order']
-            return None
+            return self._record.order
     class Order(api.ExchangeAPI.Order):
+        __slots__ = ('_order_number', '_meta', '_state')
         def __init__(self, api, order_number):
-            self._api = api
+            super().__init__(api)
             self._order_number = order_number
+            # The fields of this order are split into two records, both shared with the persistent cache: _meta holds
+            # the fields which never change for an order (order type, order subtype and pair), and _state holds those
+            # which may change when the order is modified (rate, amount and total). Scans which filter orders by type or
+            # pair only touch _meta.
+            self._meta, self._state = api._persistent_cache['orders'].setdefault(order_number, ({}, {}))
         # Definitions of abstract methods
-        @property
-        def api(self):
-            return self._api
         def get_order_type_or_none(self):
-            if 'order_type' in self._api._persistent_cache['orders'][self._order_number]:
-                return self._api._persistent_cache['orders'][self._order_number]['order_type']
-            return None
+            return self._meta.get('order_type')
         def get_order_subtype_or_none(self):
-            if 'order_subtype' in self._api._persistent_cache['orders'][self._order_number]:
-                return self._api._persistent_cache['orders'][self.order_number]['order_subtype']
-            return None
+            return self._meta.get('order_subtype')
         def get_pair_or_none(self):
-            if 'pair' in self._api._persistent_cache['orders'][self._order_number]:
-                return self._api._persistent_cache['orders'][self.order_number]['pair']
-            return None
+            return self._meta.get('pair')
         def get_rate_or_none(self):
-            if 'rate' in self._api._persistent_cache['orders'][self._order_number]:
-                return self._api._persistent_cache['orders'][self.order_number]['rate']
-            return None
+            return self._state.get('rate')
         def get_amount_or_none(self):
-            if 'amount' in self._api._persistent_cache['orders'][self._order_number]:
-                return self._api._persistent_cache['orders'][self.order_number]['amount']
-            return None
+            return self._state.get('amount')
         def get_total_or_none(self):
-            if 'total' in self._api._persistent_cache['orders'][self._order_number]:
-                return self._api._persistent_cache['orders'][self.order_number]['total']
-            return None
+            return self._state.get('total')
         def is_open_or_none(self):
-            if self._api._live_cache is not None and 'open_orders' in self._api._live_cache:
-                for open_orders in self._api._live_cache['open_orders'].values():
+            cached_open_orders = self.api._live_cache_get('open_orders')
+            if cached_open_orders is not None:
+                for open_orders in cached_open_orders.values():
                     if self in open_orders:
                         return True
                 return False
             pair = self.get_pair_or_none()
             if pair is not None:
-                return self in self._api.get_open_orders(pair=pair)
+                return self in self.api.get_open_orders(pair=pair)
             else:
-                for open_orders in self._api.get_open_orders().values():
+                for open_orders in self.api.get_open_orders().values():
                     if self in open_orders:
                         return True
                 return False
@@ -191,6 +338,7 @@ class PoloniexAPI(api.ExchangeAPI):
                      False otherwise
             print_calls: True if all API calls and their results should be printed to console, False otherwise
         """
+        super().__init__()
         if api_key is not None and not isinstance(api_key, str):
             raise TypeError("api_key must be None or of type str")
         self.api_key = api_key
@@ -200,88 +348,213 @@ class PoloniexAPI(api.ExchangeAPI):
         if min_nonce is not None and not isinstance(min_nonce, int):
             raise ValueError("min_nonce must be None or of type int")
         if min_nonce is None:
-            min_nonce = int(time.time())
+            # Nanoseconds, so that two wrappers created in quick succession don't start from the same nonce
+            min_nonce = time.time_ns()
         self.confirm = confirm
         self.print_calls = print_calls
-        self._min_nonce = min_nonce
-        self._last_request = time.time()
+        # Generates the nonce for each trading API call; next(...) on an itertools.count is atomic, so calls made from
+        # several threads never share a nonce
+        self._nonces = itertools.count(min_nonce)
+        # Held from drawing the nonce for a trading API call until its response is received (see query_trading_api)
+        self._trading_lock = threading.Lock()
+        # Limits the rate of requests to the public and trading APIs, which share a single limit
+        self._request_limiter = TokenBucket(_REQUEST_RATE, _REQUEST_BURST)
+        # The persistent connections used by _send(...), held separately by each thread
+        self._connections = threading.local()
+        # The ETags of the responses to recent GET requests, mapping URLs to tuples of the form (etag, response) where
+        # response is the parsed body of the response, which is never handed out itself, only copies of it
+        self._etags = {}
+        # Held while _etags is modified, since requests made by submit_async(...) are sent from background threads
+        self._etags_lock = threading.Lock()
+        # The time, in seconds, for which the responses to read-only trading API calls (balances and open orders) are
+        # reused while the live cache is enabled, so that a burst of lookups for different views of the same data (eg.
+        # the balances of different accounts) results in a single request
+        self.response_cache_ttl = 0.25
+        # The recent responses to read-only trading API calls, mapping (command, args) keys to tuples of the form
+        # (expiry, response) where expiry is a time.monotonic() time
+        self._response_cache = {}
         # The persistent cache caches data that doesn't change over time (eg. trade or order history).
         self._persistent_cache = {'trades': {}, 'orders': {}, 'public_trade_history': {}, 'trade_history': {}}
-        # The live cache caches data that may change over time (eg. tickers). Set to None if disabled.
-        self._live_cache = None
         # The pool used to intern trade handles (globalTradeID: PoloniexAPI.Trade)
         self._trade_pool = {}
         # The pool used to intern order handles (orderNumber: PoloniexAPI.Trade)
         self._order_pool = {}
+    @property
+    def secret(self):
+        """The member's secret as a bytes object, or None."""
+        return self._secret
+    @secret.setter
+    def secret(self, secret):
+        self._secret = secret
+        # An HMAC keyed with the secret which has not yet been fed any data; each trading API request is signed with a
+        # copy of it, so that the padded key is not hashed again for every request
+        self._hmac = hmac.new(secret, digestmod=hashlib.sha512) if secret is not None else None
+    def disable_live_cache(self):
+        super().disable_live_cache()
+        self._response_cache.clear()
+    def clear_live_cache(self):
+        super().clear_live_cache()
+        self._response_cache.clear()
     def _request(self, request):
+        self._request_limiter.acquire()
+        # Only GET requests are conditional on the ETag of the last response
+        validated = self._etags.get(request.full_url) if request.get_method() == 'GET' else None
+        body, etag = self._send(request, validated[0] if validated is not None else None)
+        if body is None:
+            # Not modified, so the earlier response is reused without parsing it again; the copy is shallow, as with
+            # get_pairs(), so that callers may add or remove entries without affecting the cached response
+            return validated[1].copy()
+        # Numbers that aren't integers are parsed directly as Decimals, rather than as floats which would need to be
+        # converted to strings and back to be represented exactly
+        response = json.loads(body.decode(), parse_float=Decimal)
+        if etag is None:
+            return response
+        with self._etags_lock:
+            self._etags.pop(request.full_url, None)
+            if len(body) > _ETAG_MAX_BODY or not isinstance(response, (dict, list)):
+                return response
+            while len(self._etags) >= _ETAG_CACHE_SIZE:
+                self._etags.pop(next(iter(self._etags)), None)
+            self._etags[request.full_url] = (etag, response)
+        return response.copy()
+    def _send(self, request, etag=None):
+        """Perform a request over a persistent connection to its host and return the body of the response.
+
+        Each thread keeps its own keep-alive connection to each host, so that the TCP and TLS handshakes are only
+        performed once rather than for every request. A GET request may be made conditional on the ETag of an earlier
+        response, in which case None is returned as the body if the server answers 304 Not Modified.
+
+        Unlike urllib.request.urlopen(...), redirects are not followed (Poloniex's API endpoints don't redirect), and
+        proxies are not supported by the persistent connections: if a proxy is configured for the request (eg. with the
+        HTTPS_PROXY environment variable), the request is instead made with urlopen(...), without keep-alive or ETags.
+
+        Args:
+            request: the urllib.request.Request object describing the request
+            etag: the ETag of the earlier response on which a GET request is conditional, or None
+        Returns:
+            a tuple of the form (body, etag) where body is the body of the response as a bytes object, or None if the
+            response was 304 Not Modified, and etag is the ETag of the response to a GET request, or None
+        Raises:
+            urllib.error.URLError: if the connection fails or times out, as raised by urllib.request.urlopen(...)
+            urllib.error.HTTPError: if the response has an HTTP error status, or is an unexpected redirect
+        """
+        if request.type in urllib.request.getproxies() and not urllib.request.proxy_bypass(request.host):
+            with urllib.request.urlopen(request, timeout=_REQUEST_TIMEOUT) as response:
+                return response.read(), None
+        connections = getattr(self._connections, 'by_host', None)
+        if connections is None:
+            # Maps (scheme, host) keys to tuples of the form (connection, last_used) where last_used is a
+            # time.monotonic() time
+            connections = self._connections.by_host = {}
+        key = (request.type, request.host)
+        headers = {'User-Agent': _USER_AGENT}
+        if request.data is not None:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        headers.update(request.header_items())
+        # Only GET requests are idempotent; a POST to the trading API may have been acted on even if no response was
+        # received, so it is never sent twice
+        idempotent = request.get_method() == 'GET'
+        if etag is not None and idempotent:
+            headers['If-None-Match'] = etag
+        else:
+            etag = None
         while True:
-            now = time.time()
-            if self._last_request + _REQUEST_DELAY <= now:
+            connection, last_used = connections.get(key, (None, None))
+            if connection is not None and not idempotent and time.monotonic() - last_used > _MAX_IDLE_FOR_UNSAFE:
+                connection.close()
+                connection = None
+            reused = connection is not None
+            if not reused:
+                connection_type = http.client.HTTPSConnection if request.type == 'https' else http.client.HTTPConnection
+                connection = connection_type(request.host, timeout=_REQUEST_TIMEOUT)
+            connections[key] = (connection, time.monotonic())
+            try:
+                connection.request(request.get_method(), request.selector, request.data, headers)
+                response = connection.getresponse()
+                body = response.read()
                 break
-            delay = self._last_request + _REQUEST_DELAY - now
-            if delay > 0:
-                time.sleep(delay)
-        response = urllib.request.urlopen(request)
-        self._last_request = time.time()
-        return json.loads(response.read().decode())
+            except (http.client.HTTPException, OSError) as e:
+                connection.close()
+                del connections[key]
+                # The server may have closed a connection that had been idle, in which case a GET request is retried
+                # once over a new connection
+                if not reused or not idempotent:
+                    if isinstance(e, OSError):
+                        raise urllib.error.URLError(e) from e
+                    raise
+        connections[key] = (connection, time.monotonic())
+        if response.status == 304 and etag is not None:
+            return None, etag
+        if response.status >= 300:
+            raise urllib.error.HTTPError(request.full_url, response.status, response.reason, response.headers,
+                    io.BytesIO(body))
+        return body, response.getheader('ETag') if idempotent else None
     def _get_trade(self, global_trade_id, trade_type, pair, rate, amount, total, fee, timestamp, trade_id, order):
-        if global_trade_id in self._trade_pool:
-            trade = self._trade_pool[global_trade_id]
-        else:
+        trade = self._trade_pool.get(global_trade_id)
+        if trade is None:
             trade = PoloniexAPI.Trade(self, global_trade_id)
             self._trade_pool[global_trade_id] = trade
-            self._persistent_cache['trades'][global_trade_id] = {}
+        # Each field is stored directly in the trade's record; a chain of conditional stores is several times faster
+        # than filtering the fields into a single update
+        record = trade._record
         if trade_type is not None:
-            self._persistent_cache['trades'][global_trade_id]['trade_type'] = trade_type
+            record.trade_type = trade_type
         if pair is not None:
-            self._persistent_cache['trades'][global_trade_id]['pair'] = pair
+            record.pair = sys.intern(pair)
         if rate is not None:
-            self._persistent_cache['trades'][global_trade_id]['rate'] = rate
+            record.rate = rate
         if amount is not None:
-            self._persistent_cache['trades'][global_trade_id]['amount'] = amount
+            record.amount = amount
         if total is not None:
-            self._persistent_cache['trades'][global_trade_id]['total'] = total
+            record.total = total
         if fee is not None:
-            self._persistent_cache['trades'][global_trade_id]['fee'] = fee
+            record.fee = fee
         if timestamp is not None:
-            self._persistent_cache['trades'][global_trade_id]['timestamp'] = timestamp
+            record.timestamp = timestamp
         if trade_id is not None:
-            self._persistent_cache['trades'][global_trade_id]['trade_id'] = trade_id
+            record.trade_id = trade_id
         if order is not None:
-            self._persistent_cache['trades'][global_trade_id]['order'] = order
+            record.order = order
         return trade
     def _parse_then_get_trade(self, pair, raw_trade, order):
-        amount = Decimal(str(raw_trade['amount']))
+        amount = _to_decimal(raw_trade['amount'])
         return self._get_trade(int(raw_trade['globalTradeID']),
                 trade_type=raw_trade['type'],
                 pair=pair,
-                rate=Decimal(str(raw_trade['rate'])),
+                rate=_to_decimal(raw_trade['rate']),
                 amount=amount,
-                total=Decimal(str(raw_trade['total'])),
-                fee=_round_ceil_ulp(amount * Decimal(str(raw_trade['fee']))) if 'fee' in raw_trade else None,
+                total=_to_decimal(raw_trade['total']),
+                fee=_round_ceil_ulp(amount * _to_decimal(raw_trade['fee'])) if 'fee' in raw_trade else None,
                 timestamp=_decode_timestamp(raw_trade['date']),
                 trade_id=int(raw_trade['tradeID']),
                 order=order)
+    def _parse_then_get_order(self, pair, raw_order):
+        return self._get_order(int(raw_order['orderNumber']),
+                order_type=raw_order['type'],
+                # TODO What if it's a lending order?
+                order_subtype='margin' if raw_order['margin'] == 1 else 'exchange',
+                pair=pair,
+                rate=_to_decimal(raw_order['rate']),
+                amount=_to_decimal(raw_order['amount']),
+                total=_to_decimal(raw_order['total']))
     def _get_order(self, order_number, order_type=None, order_subtype=None, pair=None, rate=None, amount=None,
             total=None):
-        if order_number in self._order_pool:
-            order = self._order_pool[order_number]
-        else:
+        order = self._order_pool.get(order_number)
+        if order is None:
             order = PoloniexAPI.Order(self, order_number)
             self._order_pool[order_number] = order
-            self._persistent_cache['orders'][order_number] = {}
         if order_type is not None:
-            self._persistent_cache['orders'][order_number]['order_type'] = order_type
+            order._meta['order_type'] = order_type
         if order_subtype is not None:
-            self._persistent_cache['orders'][order_number]['order_subtype'] = order_subtype
+            order._meta['order_subtype'] = order_subtype
         if pair is not None:
-            self._persistent_cache['orders'][order_number]['pair'] = pair
+            order._meta['pair'] = sys.intern(pair)
         if rate is not None:
-            self._persistent_cache['orders'][order_number]['rate'] = rate
+            order._state['rate'] = rate
         if amount is not None:
-            self._persistent_cache['orders'][order_number]['amount'] = amount
+            order._state['amount'] = amount
         if total is not None:
-            self._persistent_cache['orders'][order_number]['total'] = total
+            order._state['total'] = total
         return order
     def query_public_api(self, command, args={}):
         if not isinstance(command, str):
@@ -289,15 +562,15 @@ class PoloniexAPI(api.ExchangeAPI):
         if not isinstance(args, dict):
             raise TypeError("args must be of type dict")
         args_list = [('command', command)]
-        for key in sorted(args.keys()):
-            args_list.append((key, args[key]))
+        # Keys are unique, so sorting the items never compares the values
+        args_list.extend(sorted(args.items()))
         args_encoded = urllib.parse.urlencode(args_list)
         del args_list
         if self.print_calls:
             log('API', "Calling https://poloniex.com/public with " + args_encoded + "\n")
         response = self._request(urllib.request.Request('https://poloniex.com/public?' + args_encoded))
         if self.print_calls:
-            log('API', "Response: " + json.dumps(response) + "\n")
+            log('API', "Response: " + json.dumps(response, default=str) + "\n")
         if 'error' in response:
             if response['error'] in ["Invalid currency pair.", "Invalid currencyPair parameter."]:
                 raise api.NonexistentPairError("Nonexistent currency pair")
@@ -312,28 +585,32 @@ class PoloniexAPI(api.ExchangeAPI):
             raise TypeError("command must be of type str")
         if not isinstance(args, dict):
             raise TypeError("args must be of type dict")
-        args_list = [('command', command), ('nonce', self._min_nonce)]
-        for key in sorted(args.keys()):
-            args_list.append((key, args[key]))
-        post_data = urllib.parse.urlencode(args_list).encode()
-        del args_list
-        sign = hmac.new(self.secret, post_data, hashlib.sha512).hexdigest()
-        headers = {'Sign': sign, 'Key': self.api_key}
-        if self.confirm:
-            log('API', "Attempting to perform Poloniex Trading API request with the following arguments:\n")
-            log('API', post_data.decode() + "\n")
-            if not user_confirm('API', "Would you like to perform this API request?"):
-                log('API', "API request cancelled.\n")
-                raise RuntimeError("API request cancelled by user")
-            if self.print_calls:
-                log('API', "Calling https://poloniex.com/tradingApi\n")
-        else:
-            if self.print_calls:
-                log('API', "Calling https://poloniex.com/tradingApi with " + post_data.decode() + "\n")
-        self._min_nonce += 1
-        response = self._request(urllib.request.Request('https://poloniex.com/tradingApi', post_data, headers))
+        # Poloniex rejects a nonce lower than one it has already seen, so the nonce is drawn and the request sent while
+        # holding a lock; otherwise a call from another thread could draw a later nonce but reach the exchange first
+        with self._trading_lock:
+            args_list = [('command', command), ('nonce', next(self._nonces))]
+            # Keys are unique, so sorting the items never compares the values
+            args_list.extend(sorted(args.items()))
+            post_data = urllib.parse.urlencode(args_list).encode()
+            del args_list
+            mac = self._hmac.copy()
+            mac.update(post_data)
+            sign = mac.hexdigest()
+            headers = {'Sign': sign, 'Key': self.api_key}
+            if self.confirm:
+                log('API', "Attempting to perform Poloniex Trading API request with the following arguments:\n")
+                log('API', post_data.decode() + "\n")
+                if not user_confirm('API', "Would you like to perform this API request?"):
+                    log('API', "API request cancelled.\n")
+                    raise RuntimeError("API request cancelled by user")
+                if self.print_calls:
+                    log('API', "Calling https://poloniex.com/tradingApi\n")
+            else:
+                if self.print_calls:
+                    log('API', "Calling https://poloniex.com/tradingApi with " + post_data.decode() + "\n")
+            response = self._request(urllib.request.Request('https://poloniex.com/tradingApi', post_data, headers))
         if self.print_calls:
-            log('API', "Response: " + json.dumps(response) + "\n")
+            log('API', "Response: " + json.dumps(response, default=str) + "\n")
         if 'error' in response:
             if response['error'] in ["Invalid currency pair.", "Invalid currencyPair parameter."]:
                 raise api.NonexistentPairError("Nonexistent currency pair")
@@ -345,16 +622,19 @@ class PoloniexAPI(api.ExchangeAPI):
             raise api.ExchangeAPIError("Command '" + command + "' of the trading API resulted in success != 1" + (': ' +
                     response['message'] if 'message' in response else ''))
         return response
-    def enable_live_cache(self):
-        if self._live_cache is None:
-            self._live_cache = {'orders': {}, 'balance': {}, 'detailed_balance': {}, 'order_trades': {}}
-    def disable_live_cache(self):
-        self._live_cache = None
-    def clear_live_cache(self):
-        self.disable_live_cache()
-        self.enable_live_cache()
-    def is_live_cache_enabled(self):
-        return self._live_cache is not None
+    def _query_trading_api_cached(self, command, args={}):
+        # Like query_trading_api(...), but reuses a response received within the last response_cache_ttl seconds if the
+        # live cache is enabled; only for commands which don't change anything
+        if not self.is_live_cache_enabled():
+            return self.query_trading_api(command, args)
+        key = (command, frozenset(args.items()))
+        now = time.monotonic()
+        cached = self._response_cache.get(key)
+        if cached is not None and now < cached[0]:
+            return cached[1]
+        response = self.query_trading_api(command, args)
+        self._response_cache[key] = (now + self.response_cache_ttl, response)
+        return response
     def get_currencies(self):
         if 'currencies' not in self._persistent_cache:
             self._persistent_cache['currencies'] = self._get_currencies()
@@ -365,39 +645,29 @@ class PoloniexAPI(api.ExchangeAPI):
     def get_pairs(self):
         if 'pairs' not in self._persistent_cache:
             self._persistent_cache['pairs'] = self._get_pairs()
-        return self._persistent_cache['pairs'].copy()
+        # While the live cache is enabled, every call returns the same copy
+        return self._cached('pairs', lambda: self._persistent_cache['pairs'].copy())
     def _get_pairs(self):
-        response = self.query_public_api('returnTicker')
-        pairs = {}
-        for raw_pair in response:
-            pairs[_decode_pair(raw_pair)] = api.PairInfo(base_ulp=_POLONIEX_ULP, quote_ulp=_POLONIEX_ULP)
-        return pairs
+        # The pairs are listed by the returnTicker command, so the ticker it returns is kept in the live cache as well
+        ticker = _parse_ticker(self.query_public_api('returnTicker'))
+        self._live_cache_put('ticker', ticker)
+        return _pairs_from_ticker(ticker)
     def get_ticker(self, pair=None):
-        if pair is not None:
-            if not isinstance(pair, str):
-                raise TypeError("pair must be None or of type str")
-            if _PAIR_REGEXP.match(pair) is None:
-                raise ValueError("Malformed pair")
-        if self._live_cache is None:
+        _validate_pair(pair, allow_none=True)
+        if not self.is_live_cache_enabled():
             return self._get_ticker(pair)
-        if 'ticker' not in self._live_cache:
-            self._live_cache['ticker'] = self._get_ticker(None)
+        ticker = self._cached('ticker', self._get_ticker)
         if pair is None:
-            return self._live_cache['ticker'].copy()
-        if pair in self._live_cache['ticker']:
-            return self._live_cache['ticker'][pair]
+            return ticker.copy()
+        if pair in ticker:
+            return ticker[pair]
         else:
             raise api.NonexistentPairError("Nonexistent currency pair '" + pair + "'")
     def _get_ticker(self, pair=None):
-        raw_ticker = self.query_public_api('returnTicker')
-        ticker = {}
-        for p in raw_ticker:
-            ticker[_decode_pair(p)] = api.Ticker(highest_bid=Decimal(str(raw_ticker[p]['highestBid'])),
-                    lowest_ask=Decimal(str(raw_ticker[p]['lowestAsk'])),
-                    last=Decimal(str(raw_ticker[p]['last'])),
-                    base_volume=Decimal(str(raw_ticker[p]['baseVolume'])),
-                    quote_volume=Decimal(str(raw_ticker[p]['quoteVolume'])),
-                    percent_change=Decimal(str(raw_ticker[p]['percentChange'])))
+        ticker = _parse_ticker(self.query_public_api('returnTicker'))
+        # The ticker lists every pair, so the pairs need not be retrieved separately
+        if 'pairs' not in self._persistent_cache:
+            self._persistent_cache['pairs'] = _pairs_from_ticker(ticker)
         if pair is None:
             return ticker
         if pair in ticker:
@@ -405,54 +675,34 @@ class PoloniexAPI(api.ExchangeAPI):
         else:
             raise api.NonexistentPairError("Nonexistent currency pair '" + pair + "'")
     def get_order_book(self, pair=None, depth=10):
-        if pair is not None:
-            if not isinstance(pair, str):
-                raise TypeError("pair must be None or of type str")
-            if _PAIR_REGEXP.match(pair) is None:
-                raise ValueError("Malformed pair")
+        _validate_pair(pair, allow_none=True)
         if not isinstance(depth, int):
             raise TypeError("depth must be of type int")
         if depth <= 0:
             raise ValueError("depth must be a positive integer")
-        if self._live_cache is None:
+        if not self.is_live_cache_enabled():
             return self._get_order_book(pair, depth)
-        if 'order_book' not in self._live_cache or self._live_cache['order_book']['depth'] < depth:
-            self._live_cache['order_book'] = {'order_book': self._get_order_book(None, depth), 'depth': depth}
+        cached = self._live_cache_get('order_book')
+        if cached is None or cached['depth'] < depth:
+            cached = {'order_book': self._get_order_book(None, depth), 'depth': depth}
+            self._live_cache_put('order_book', cached)
         if pair is None:
-            return self._live_cache['order_book']['order_book'].copy()
-        if pair in self._live_cache['order_book']['order_book']:
-            return self._live_cache['order_book']['order_book'][pair]
+            return cached['order_book'].copy()
+        if pair in cached['order_book']:
+            return cached['order_book'][pair]
         else:
             raise api.NonexistentPairError("Nonexistent currency pair '" + pair + "'")
     def _get_order_book(self, pair=None, depth=10):
         raw_order_book = self.query_public_api('returnOrderBook', {'currencyPair': _encode_pair(pair) if pair is not
                 None else 'all', 'depth': depth})
         if pair is not None:
-            bids = []
-            asks = []
-            for bid in raw_order_book['bids']:
-                bids.append(api.Bid(rate=Decimal(str(bid[0])), amount=Decimal(str(bid[1]))))
-            for ask in raw_order_book['asks']:
-                asks.append(api.Ask(rate=Decimal(str(ask[0])), amount=Decimal(str(ask[1]))))
-            order_book = api.OrderBook(bids=tuple(bids), asks=tuple(asks))
-            return order_book
+            return _parse_order_book(raw_order_book)
         order_books = {}
         for raw_p in raw_order_book:
-            p = _decode_pair(raw_p)
-            asks = []
-            bids = []
-            for bid in raw_order_book[raw_p]['bids']:
-                bids.append(api.Bid(rate=Decimal(str(bid[0])), amount=Decimal(str(bid[1]))))
-            for ask in raw_order_book[raw_p]['asks']:
-                asks.append(api.Ask(rate=Decimal(str(ask[0])), amount=Decimal(str(ask[1]))))
-            order_books[p] = api.OrderBook(bids=tuple(bids), asks=tuple(asks))
+            order_books[_decode_pair(raw_p)] = _parse_order_book(raw_order_book[raw_p])
         return order_books
     def get_public_trade_history(self, pair, start=None, end=None):
-        if pair is not None:
-            if not isinstance(pair, str):
-                raise TypeError("pair must be None or of type str")
-            if _PAIR_REGEXP.match(pair) is None:
-                raise ValueError("Malformed pair")
+        _validate_pair(pair, allow_none=True)
         if start is not None and not isinstance(start, int):
             raise ValueError("start must be None or of type int")
         if end is not None and not isinstance(end, int):
@@ -468,12 +718,9 @@ class PoloniexAPI(api.ExchangeAPI):
             try:
                 trades = self._get_public_trade_history(pair, start, end)
                 if len(trades) == 50000:
-                    start = min(trades, key=lambda trade: trade.get_timestamp()).get_timestamp()
-                    end = max(trades, key=lambda trade: trade.get_timestamp()).get_timestamp()
-                self._persistent_cache['public_trade_history'][pair] = {
-                    'times_cached': IntRanges((start, end)),
-                    'trades': set(trades)
-                }
+                    timestamps = [trade.get_timestamp() for trade in trades]
+                    start, end = min(timestamps), max(timestamps)
+                self._persistent_cache['public_trade_history'][pair] = _new_trade_history_cache(start, end, trades)
                 if len(trades) == 50000:
                     raise api.ExchangeAPIError(
                             "Reached maximum number of trades that may be retrieved in a single call: 50000")
@@ -484,15 +731,14 @@ class PoloniexAPI(api.ExchangeAPI):
             # TODO This can be optimized - much of the data retrieved by this call may already be cached
             trades = self._get_public_trade_history(pair, start, end)
             if len(trades) == 50000:
-                start = min(trades, key=lambda trade: trade.get_timestamp()).get_timestamp()
-                end = max(trades, key=lambda trade: trade.get_timestamp()).get_timestamp()
-            self._persistent_cache['public_trade_history'][pair]['trades'].update(trades)
+                timestamps = [trade.get_timestamp() for trade in trades]
+                start, end = min(timestamps), max(timestamps)
+            _add_to_trade_history_cache(self._persistent_cache['public_trade_history'][pair], trades)
             self._persistent_cache['public_trade_history'][pair]['times_cached'].add_range(start, end)
             if len(trades) == 50000:
                 raise api.ExchangeAPIError(
                         "Reached maximum number of trades that may be retrieved in a single call: 50000")
-        return [trade for trade in self._persistent_cache['public_trade_history'][pair]['trades'] if start <=
-                trade.get_timestamp() <= end]
+        return _cached_trades_within(self._persistent_cache['public_trade_history'][pair], start, end)
     def _get_public_trade_history(self, pair, start=None, end=None):
         params = {'currencyPair': _encode_pair(pair)}
         if start is not None:
@@ -504,10 +750,7 @@ class PoloniexAPI(api.ExchangeAPI):
             raise api.NonexistentPairError("Nonexistent currency pair '" + pair + "'") from None
         return [self._parse_then_get_trade(pair, raw_trade, None) for raw_trade in response]
     def get_trade_history(self, pair, start=None, end=None):
-        if not isinstance(pair, str):
-            raise TypeError("pair must be of type str")
-        if _PAIR_REGEXP.match(pair) is None:
-            raise ValueError("Malformed pair")
+        _validate_pair(pair)
         if start is not None and not isinstance(start, int):
             raise ValueError("start must be None or of type int")
         if end is not None and not isinstance(end, int):
@@ -523,12 +766,9 @@ class PoloniexAPI(api.ExchangeAPI):
             try:
                 trades = self._get_trade_history(pair, start, end)
                 if len(trades) == 50000:
-                    start = min(trades, key=lambda trade: trade.get_timestamp())
-                    end = max(trades, key=lambda trade: trade.get_timestamp())
-                self._persistent_cache['trade_history'][pair] = {
-                    'times_cached': IntRanges((start, end)),
-                    'trades': set(trades)
-                }
+                    timestamps = [trade.get_timestamp() for trade in trades]
+                    start, end = min(timestamps), max(timestamps)
+                self._persistent_cache['trade_history'][pair] = _new_trade_history_cache(start, end, trades)
                 if len(trades) == 50000:
                     raise api.ExchangeAPIError(
                             "Reached maximum number of trades that may be retrieved in a single call: 50000")
@@ -539,15 +779,14 @@ class PoloniexAPI(api.ExchangeAPI):
             # TODO This can be optimized - much of the data retrieved by this call may already be cached
             trades = self._get_trade_history(pair, start, end)
             if len(trades) == 50000:
-                start = min(trades, key=lambda trade: trade.get_timestamp())
-                end = max(trades, key=lambda trade: trade.get_timestamp())
-            self._persistent_cache['trade_history'][pair]['trades'].update(trades)
+                timestamps = [trade.get_timestamp() for trade in trades]
+                start, end = min(timestamps), max(timestamps)
+            _add_to_trade_history_cache(self._persistent_cache['trade_history'][pair], trades)
             self._persistent_cache['trade_history'][pair]['times_cached'].add_range(start, end)
             if len(trades) == 50000:
                 raise api.ExchangeAPIError(
                         "Reached maximum number of trades that may be retrieved in a single call: 50000")
-        return [trade for trade in self._persistent_cache['trade_history'][pair]['trades'] if start <=
-                trade.get_timestamp() <= end]
+        return _cached_trades_within(self._persistent_cache['trade_history'][pair], start, end)
     def _get_trade_history(self, pair, start=None, end=None):
         params = {'currencyPair': _encode_pair(pair)}
         if start is not None:
@@ -557,16 +796,17 @@ class PoloniexAPI(api.ExchangeAPI):
             response = self.query_trading_api('returnTradeHistory', params)
         except api.NonexistentPairError:
             raise api.NonexistentPairError("Nonexistent currency pair '" + pair + "'") from None
-        trades = [self._parse_then_get_trade(pair, raw_trade, self._get_order(int(raw_trade['orderNumber']),
+        # Check the number of trades before parsing them, so that a response which is going to be rejected anyway is
+        # not parsed in full first
+        if len(response) == 50000:
+            raise api.ExchangeAPIError("Reached maximum number of trades that may be retrieved in a single call: 50000")
+        return [self._parse_then_get_trade(pair, raw_trade, self._get_order(int(raw_trade['orderNumber']),
                 order_type=raw_trade['type'],
                 order_subtype=raw_trade['category'],
                 pair=pair,
-                rate=Decimal(str(raw_trade['rate'])),
-                amount=Decimal(str(raw_trade['amount'])),
-                total=Decimal(str(raw_trade['total'])))) for raw_trade in response]
-        if len(trades) == 50000:
-            raise api.ExchangeAPIError("Reached maximum number of trades that may be retrieved in a single call: 50000")
-        return trades
+                rate=_to_decimal(raw_trade['rate']),
+                amount=_to_decimal(raw_trade['amount']),
+                total=_to_decimal(raw_trade['total']))) for raw_trade in response]
     def get_balance(self, currency=None, availability='all', account='all'):
         """Get the account balance of the exchange member for all currencies or for a single currency. Funds are
         included in the calculated balance if and only if all of the following conditions are met:
@@ -594,147 +834,60 @@ class PoloniexAPI(api.ExchangeAPI):
         Raises:
             ExchangeAPIError: if an error occurs
         """
-        if currency is not None:
-            if not isinstance(currency, str):
-                raise ValueError("currency must be None or of type str")
-            if _CURRENCY_REGEXP.match(currency) is None:
-                raise ValueError("Malformed currency")
+        _validate_currency(currency, allow_none=True)
         if availability not in ['all', 'available', 'on_order']:
             raise ValueError("availability must be one of 'all', 'available', or 'on_order'")
         if account not in ['all', 'exchange', 'margin', 'lending']:
             raise ValueError("account must be one of 'all', 'exchange', 'margin', or 'lending'")
-        if self._live_cache is None:
-            balances = self._get_balance(availability, account)
-        else:
-            if availability not in self._live_cache['balance']:
-                self._live_cache['balance'][availability] = {}
-            if account not in self._live_cache['balance'][availability]:
-                self._live_cache['balance'][availability][account] = self._get_balance(availability, account)
-            balances = self._live_cache['balance'][availability][account]
+        balances = self._cached(('balance', availability, account), lambda: self._get_balance(availability, account))
         if currency is None:
             return balances.copy()
         if currency in balances:
             return balances[currency]
         else:
-            return Decimal(0)
+            return _DECIMAL_ZERO
     def _get_balance(self, availability, account):
-        response = self.query_trading_api('returnCompleteBalances', {'account': account if account is not None else
-                'all'})
-        if availability == 'all':
-            if account == 'all':
-                response = self.query_trading_api('returnCompleteBalances', {'account': 'all'})
-                balances = {}
-                for c in response:
-                    balances[c] = Decimal(str(response[c]['available'])) + Decimal(str(response[c]['onOrders']))
-            elif account == 'exchange':
-                response = self.query_trading_api('returnCompleteBalances')
-                balances = {}
-                for c in response:
-                    balances[c] = Decimal(str(response[c]['available'])) + Decimal(str(response[c]['onOrders']))
-            elif account == 'margin':
-                raise api.NotSupportedError("Getting the total margin account balance is not supported")
-            else: # account == 'lending'
-                raise api.NotSupportedError("Getting the total lending account balance is not supported")
-        elif availability == 'available':
-            if account == 'all':
-                response = self.query_trading_api('returnAvailableAccountBalances')
-                balances = {}
-                for a in response:
-                    for c in response[a]:
-                        if c not in balances:
-                            balances[c] = Decimal(0)
-                        balances[c] += Decimal(str(response[a][c]))
-            elif account == 'exchange':
-                response = self.query_trading_api('returnAvailableAccountBalances', {'account': 'exchange'})
-                balances = {}
-                for c in response['exchange']:
-                    balances[c] = Decimal(str(response['exchange'][c]))
-            elif account == 'margin':
-                response = self.query_trading_api('returnAvailableAccountBalances', {'account': 'margin'})
-                balances = {}
-                for c in response['margin']:
-                    balances[c] = Decimal(str(response['margin'][c]))
-            else: # account == 'lending'
-                response = self.query_trading_api('returnAvailableAccountBalances', {'account': 'lending'})
-                balances = {}
-                for c in response['lending']:
-                    balances[c] = Decimal(str(response['lending'][c]))
-        else: # availability == 'on_order'
-            if account == 'all':
-                response = self.query_trading_api('returnCompleteBalances', {'account': 'all'})
-                balances = {}
-                for c in response:
-                    balances[c] = Decimal(str(response[c]['onOrders']))
-            elif account == 'exchange':
-                response = self.query_trading_api('returnCompleteBalances')
-                balances = {}
-                for c in response:
-                    balances[c] = Decimal(str(response[c]['onOrders']))
-            elif account == 'margin':
-                raise api.NotSupportedError("Getting the margin account balance on order is not supported")
-            else: # account == 'lending'
-                raise api.NotSupportedError("Getting the lending account balance on order is not supported")
-        to_remove = []
-        for c in balances:
-            if balances[c] == 0:
-                to_remove.append(c)
-        for c in to_remove:
-            del balances[c]
+        query = _BALANCE_QUERIES.get((availability, account))
+        if query is None:
+            if availability == 'all':
+                raise api.NotSupportedError("Getting the total {} account balance is not supported".format(account))
+            else: # availability == 'on_order'
+                raise api.NotSupportedError("Getting the {} account balance on order is not supported".format(account))
+        command, args, extract = query
+        response = self._query_trading_api_cached(command, args)
+        balances = {}
+        for c, amount in extract(response):
+            if amount != 0:
+                balances[c] = balances.get(c, _DECIMAL_ZERO) + amount
         return balances
     def get_open_orders(self, pair=None):
-        if pair is not None:
-            if not isinstance(pair, str):
-                raise TypeError("pair must be None or of type str")
-            if _PAIR_REGEXP.match(pair) is None:
-                raise ValueError("Malformed pair")
-        if self._live_cache is None:
+        _validate_pair(pair, allow_none=True)
+        if not self.is_live_cache_enabled():
             return self._get_open_orders(pair)
-        if 'open_orders' not in self._live_cache:
-            self._live_cache['open_orders'] = self._get_open_orders()
+        open_orders = self._cached('open_orders', self._get_open_orders)
         if pair is None:
-            return self._live_cache['open_orders'].copy()
-        if pair in self._live_cache['open_orders']:
-            return self._live_cache['open_orders'][pair]
+            return open_orders.copy()
+        if pair in open_orders:
+            return open_orders[pair]
         else:
             raise api.NonexistentPairError("Nonexistent currency pair '" + pair + "'")
     def _get_open_orders(self, pair=None):
-        response = self.query_trading_api('returnOpenOrders', {'currencyPair': _encode_pair(pair) if pair is not None
-                else 'all'})
+        response = self._query_trading_api_cached('returnOpenOrders', {'currencyPair': _encode_pair(pair) if pair is not
+                None else 'all'})
         if pair is None:
             open_orders = {}
-            for raw_p in response:
+            for raw_p, raw_orders in response.items():
                 p = _decode_pair(raw_p)
-                open_orders[p] = []
-                for raw_order in response[raw_p]:
-                    open_orders[p].append(self._get_order(int(raw_order['orderNumber']),
-                            order_type=raw_order['type'],
-                            # TODO What if it's a lending order?
-                            order_subtype='margin' if raw_order['margin'] == 1 else 'exchange',
-                            pair=p,
-                            rate=Decimal(str(raw_order['rate'])),
-                            amount=Decimal(str(raw_order['amount'])),
-                            total=Decimal(str(raw_order['total']))))
+                open_orders[p] = [self._parse_then_get_order(p, raw_order) for raw_order in raw_orders]
             return open_orders
         else:
-            open_orders = []
-            for raw_order in response:
-                open_orders.append(self._get_order(int(raw_order['orderNumber']),
-                        order_type=raw_order['type'],
-                        # TODO What if it's a lending order?
-                        order_subtype='margin' if raw_order['margin'] == 1 else 'exchange',
-                        pair=pair,
-                        rate=Decimal(str(raw_order['rate'])),
-                        amount=Decimal(str(raw_order['amount'])),
-                        total=Decimal(str(raw_order['total']))))
-            return open_orders
+            return [self._parse_then_get_order(pair, raw_order) for raw_order in response]
     def get_order_trades(self, order):
         if not isinstance(order, PoloniexAPI.Order):
             raise TypeError("order must be of type PoloniexAPI.Order")
-        if self._live_cache is None:
+        if not self.is_live_cache_enabled():
             return self._get_order_trades(order)
-        if order not in self._live_cache['order_trades']:
-            self._live_cache['order_trades'][order] = self._get_order_trades(order)
-        return self._live_cache['order_trades'][order].copy()
+        return self._cached(('order_trades', order), lambda: self._get_order_trades(order)).copy()
     def _get_order_trades(self, order):
         try:
             response = self.query_trading_api('returnOrderTrades', {'orderNumber': str(order.order_number)})
@@ -743,19 +896,17 @@ class PoloniexAPI(api.ExchangeAPI):
         except OrderNotFoundError:
             return []
     def place_buy_order(self, pair, rate, amount, order_subtype='exchange', lending_rate="0.02"):
-        if not isinstance(pair, str):
-            raise TypeError("pair must be of type str")
-        if _PAIR_REGEXP.match(pair) is None:
-            raise ValueError("Malformed pair")
-        rate = Decimal(str(rate))
+        _validate_pair(pair)
+        rate = _as_decimal(rate)
         if rate < 0:
             raise ValueError("rate must be >= 0")
-        amount = Decimal(str(amount))
+        amount = _as_decimal(amount)
         if amount <= 0:
             raise ValueError("amount must be > 0")
         if order_subtype == 'exchange':
-            response = self.query_trading_api('buy', {'currencyPair': _encode_pair(pair), 'rate': "{:f}".format(rate),
-                    'amount': "{:f}".format(amount)})
+            response = self.query_trading_api('buy', {'currencyPair': _encode_pair(pair),
+                    'rate': _format_decimal(rate), 'amount': _format_decimal(amount)})
+            self._response_cache.clear()
             order = self._get_order(int(response['orderNumber']),
                     order_type='buy',
                     order_subtype='exchange',
@@ -763,13 +914,16 @@ class PoloniexAPI(api.ExchangeAPI):
                     rate=rate,
                     amount=amount,
                     total=None) # TODO Calculate total
-            if self._live_cache is not None and 'open_orders' in self._live_cache:
-                self._live_cache['open_orders'][pair].append(order)
+            open_orders = self._live_cache_get('open_orders')
+            if open_orders is not None:
+                open_orders[pair].append(order)
             return order
         if order_subtype == 'margin':
-            lending_rate = Decimal(str(lending_rate))
-            response = self.query_trading_api('marginBuy', {'currencyPair': _encode_pair(pair), 'rate':
-                    "{:f}".format(rate), 'amount': "{:f}".format(amount), 'lendingRate': "{:f}".format(lending_rate)})
+            lending_rate = _as_decimal(lending_rate)
+            response = self.query_trading_api('marginBuy', {'currencyPair': _encode_pair(pair),
+                    'rate': _format_decimal(rate), 'amount': _format_decimal(amount),
+                    'lendingRate': _format_decimal(lending_rate)})
+            self._response_cache.clear()
             order = self._get_order(int(response['orderNumber']),
                     order_type='buy',
                     order_subtype='margin',
@@ -777,25 +931,24 @@ class PoloniexAPI(api.ExchangeAPI):
                     rate=rate,
                     amount=amount,
                     total=None) # TODO Calculate total
-            if self._live_cache is not None and 'open_orders' in self._live_cache:
-                self._live_cache['open_orders'][pair].append(order)
+            open_orders = self._live_cache_get('open_orders')
+            if open_orders is not None:
+                open_orders[pair].append(order)
             return order
         else:
             raise ValueError("order_subtype must be 'exchange' or 'margin'")
     def place_sell_order(self, pair, rate, amount, order_subtype='exchange', lending_rate="0.02"):
-        if not isinstance(pair, str):
-            raise TypeError("pair must be of type str")
-        if _PAIR_REGEXP.match(pair) is None:
-            raise ValueError("Malformed pair")
-        rate = Decimal(str(rate))
+        _validate_pair(pair)
+        rate = _as_decimal(rate)
         if rate < 0:
             raise ValueError("rate must be >= 0")
-        amount = Decimal(str(amount))
+        amount = _as_decimal(amount)
         if amount <= 0:
             raise ValueError("amount must be > 0")
         if order_subtype == 'exchange':
-            response = self.query_trading_api('sell', {'currencyPair': _encode_pair(pair), 'rate': "{:f}".format(rate),
-                    'amount': "{:f}".format(amount)})
+            response = self.query_trading_api('sell', {'currencyPair': _encode_pair(pair),
+                    'rate': _format_decimal(rate), 'amount': _format_decimal(amount)})
+            self._response_cache.clear()
             order = self._get_order(int(response['orderNumber']),
                     order_type='sell',
                     order_subtype='exchange',
@@ -803,13 +956,16 @@ class PoloniexAPI(api.ExchangeAPI):
                     rate=rate,
                     amount=amount,
                     total=None) # TODO Calculate total
-            if self._live_cache is not None and 'open_orders' in self._live_cache:
-                self._live_cache['open_orders'][pair].append(order)
+            open_orders = self._live_cache_get('open_orders')
+            if open_orders is not None:
+                open_orders[pair].append(order)
             return order
         if order_subtype == 'margin':
-            lending_rate = Decimal(str(lending_rate))
-            response = self.query_trading_api('marginSell', {'currencyPair': _encode_pair(pair), 'rate':
-                    "{:f}".format(rate), 'amount': "{:f}".format(amount), 'lendingRate': "{:f}".format(lending_rate)})
+            lending_rate = _as_decimal(lending_rate)
+            response = self.query_trading_api('marginSell', {'currencyPair': _encode_pair(pair),
+                    'rate': _format_decimal(rate), 'amount': _format_decimal(amount),
+                    'lendingRate': _format_decimal(lending_rate)})
+            self._response_cache.clear()
             order = self._get_order(int(response['orderNumber']),
                     order_type='sell',
                     order_subtype='margin',
@@ -817,8 +973,9 @@ class PoloniexAPI(api.ExchangeAPI):
                     rate=rate,
                     amount=amount,
                     total=None) # TODO Calculate total
-            if self._live_cache is not None and 'open_orders' in self._live_cache:
-                self._live_cache['open_orders'][pair].append(order)
+            open_orders = self._live_cache_get('open_orders')
+            if open_orders is not None:
+                open_orders[pair].append(order)
             return order
         else:
             raise ValueError("order_subtype must be 'exchange' or 'margin'")
@@ -826,8 +983,15 @@ class PoloniexAPI(api.ExchangeAPI):
         if not isinstance(order, PoloniexAPI.Order):
             raise TypeError("order must be of type PoloniexAPI.Order")
         self.query_trading_api('cancelOrder', {'orderNumber': str(order.order_number)})
-        if self._live_cache is not None and 'open_orders' in self._live_cache:
-            del self._live_cache['open_orders']
+        self._response_cache.clear()
+        # Remove just the cancelled order from the cached open orders, rather than discarding them all and having to
+        # fetch every pair's open orders again
+        open_orders = self._live_cache_get('open_orders')
+        if open_orders is not None:
+            pair = order.get_pair_or_none()
+            for p in (open_orders if pair is None else (pair,)):
+                if p in open_orders:
+                    open_orders[p] = [o for o in open_orders[p] if o.order_number != order.order_number]
     def modify_order(self, order, new_rate=None, new_amount=None):
         if not isinstance(order, PoloniexAPI.Order):
             raise TypeError("order must be of type PoloniexAPI.Order")
@@ -835,11 +999,13 @@ class PoloniexAPI(api.ExchangeAPI):
             return
         params = {'orderNumber': str(order.order_number)}
         if new_rate is not None:
-            params['rate'] = "{:f}".format(Decimal(str(new_rate)))
+            params['rate'] = _format_decimal(_as_decimal(new_rate))
         else:
-            params['rate'] = "{:f}".format(order.rate)
+            params['rate'] = _format_decimal(order.get_rate())
         if new_amount is not None:
-            params['amount'] = "{:f}".format(Decimal(str(new_amount)))
+            params['amount'] = _format_decimal(_as_decimal(new_amount))
         self.query_trading_api('moveOrder', params)
-        if self._live_cache is not None and 'open_orders' in self._live_cache:
-            del self._live_cache['open_orders']
+        self._response_cache.clear()
+        # Poloniex replaces a moved order with a new one under a new order number, so the cached open orders can't
+        # simply be updated in place
+        self._live_cache_discard('open_orders')
@@ -19,8 +19,15 @@
 #    misrepresented as being the original software.
 # 3. This notice may not be removed or altered from any source distribution.
 
+import bisect
 import calendar
+from concurrent.futures import Future, ThreadPoolExecutor
+import functools
+import heapq
+import itertools
 import math
+import queue
+import threading
 import time
 
 from . import api
@@ -32,7 +39,9 @@ __all__ = [
     'log',
     'ObjectInfo',
     'IntRanges',
-    'Graph'
+    'Graph',
+    'AsyncBatch',
+    'TokenBucket'
 ]
 
 def format_timestamp(secs):
@@ -52,8 +61,25 @@ def parse_timestamp(timestamp):
         timestamp: the timestamp, as a string
     Returns:
         the number of seconds since the UNIX Epoch, as described by the timestamp
+    Raises:
+        ValueError: if the timestamp is malformed
     """
-    return calendar.timegm(time.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ"))
+    # The format is fixed-width, so the fields are sliced out directly, which is many times faster than
+    # time.strptime(...); each field must consist of ASCII digits only (int(...) alone would also accept eg. "+1" or
+    # "1_0") and must be in range for its position (calendar.timegm(...) alone would roll eg. February 31 over into
+    # March)
+    if (len(timestamp) != 20 or timestamp[4] != '-' or timestamp[7] != '-' or timestamp[10] != 'T' or
+            timestamp[13] != ':' or timestamp[16] != ':' or timestamp[19] != 'Z'):
+        raise ValueError("Malformed timestamp")
+    digits = timestamp[0:4] + timestamp[5:7] + timestamp[8:10] + timestamp[11:13] + timestamp[14:16] + timestamp[17:19]
+    if not (digits.isascii() and digits.isdigit()):
+        raise ValueError("Malformed timestamp")
+    fields = (int(timestamp[0:4]), int(timestamp[5:7]), int(timestamp[8:10]), int(timestamp[11:13]),
+            int(timestamp[14:16]), int(timestamp[17:19]))
+    if not (fields[0] >= 1 and 1 <= fields[1] <= 12 and 1 <= fields[2] <= calendar.monthrange(fields[0], fields[1])[1]
+            and fields[3] <= 23 and fields[4] <= 59 and fields[5] <= 61):
+        raise ValueError("Malformed timestamp")
+    return calendar.timegm(fields)
 
 def user_confirm(symbol, prompt):
     """Ask the user for yes / no confirmation using the console.
@@ -69,12 +95,19 @@ def user_confirm(symbol, prompt):
         if result == "n" or result == "no":
             return False
 
+@functools.lru_cache(maxsize=64)
+def _log_prefixes(symbol):
+    # Only a handful of symbols are ever used, so the prefix of each line (and the line break followed by the prefix,
+    # which replaces line breaks within a message) is only built once per symbol
+    prefix = "[" + symbol + " " * (4 - len(symbol)) + "] "
+    return prefix, "\n" + prefix
+
 def log(symbol, message):
     trailing_lf = message.endswith("\n")
     if trailing_lf:
         message = message[:-1]
-    prefix = "[" + symbol + " " * (4 - len(symbol)) + "] "
-    message = prefix + message.replace("\n", "\n" + prefix)
+    prefix, lf_prefix = _log_prefixes(symbol)
+    message = prefix + message.replace("\n", lf_prefix)
     if trailing_lf:
         message += "\n"
     print(message, end="")
@@ -94,69 +127,66 @@ class ObjectInfo:
         Args:
             key: the name to use when displaying this info, as a string
             value: the value of the info as a string, an ObjectInfo object, or a callable that will result in a valid
-                   value for this parameter or raise an InsufficientInformationError
+                   value for this parameter or raise an InsufficientInformationError; a callable is not called until the
+                   info is formatted, and is called at most once
         """
 
         self.info.append((key, value))
     def format_multiline(self):
         """Generate a multiline string representation of this object."""
 
-        s = "<" + self.name + ">\n"
-        if len(self.info) == 0:
-            return s
-        s += ObjectInfo._format_multiline(self.info, 1)
-        return s
-    def _format_multiline(info, indent):
-        s = ""
-        for key, value in info:
-            s += "    " * indent + key + ": "
+        out = ["<", self.name, ">\n"]
+        ObjectInfo._format_multiline(self.info, 1, out)
+        return "".join(out)
+    def _format_multiline(info, indent, out):
+        # Appends the formatted lines to out, which is joined only once by format_multiline()
+        for i in range(len(info)):
+            key, value = info[i]
+            out.append("    " * indent + key + ": ")
             while not isinstance(value, str) and not isinstance(value, ObjectInfo):
                 try:
                     value = value()
                 except api.InsufficientInformationError:
                     value = "<?>"
+            # Store the result so that a callable is not called again if this object is formatted again
+            info[i] = (key, value)
             if isinstance(value, str):
-                s += value + "\n"
+                out.append(value + "\n")
             else:
-                s += "<" + value.name + ">\n"
-                s += ObjectInfo._format_multiline(self.info, indent + 1)
-        return s
+                out.append("<" + value.name + ">\n")
+                ObjectInfo._format_multiline(value.info, indent + 1, out)
 
 class IntRanges:
+    """A set of integers, represented as a sorted list of disjoint inclusive ranges.
+
+    Ranges which overlap or are adjacent are merged when added, so every lookup is a binary search over the starts of
+    the ranges.
+
+    Args:
+        ranges: any number of (start, end) tuples, each representing the integers from start to end inclusive
+    """
     def __init__(self, *ranges):
-        self._ranges = []
+        # The starts and ends of the ranges, in ascending order; no two ranges overlap or are adjacent
+        self._starts = []
+        self._ends = []
         for r in ranges:
             self.add_range(r[0], r[1])
     def add_range(self, start, end):
-        to_remove = []
-        for i in range(len(self._ranges)):
-            if start <= self._ranges[i][0] and end >= self._ranges[i][1]:
-                to_remove.append(i)
-        to_remove.reverse()
-        for i in to_remove:
-            del self._ranges[i]
-        del to_remove
-        for i in range(len(self._ranges)):
-            if start <= self._ranges[i][1]:
-                start = self._ranges[i][0]
-                del self._ranges[i]
-                break
-        for i in range(len(self._ranges)):
-            if end >= self._ranges[i][0]:
-                end = self._ranges[i][1]
-                del self._ranges[i]
-                break
-        self._ranges.append((start, end))
+        # The ranges from lo (the first ending at or after start - 1) up to hi (the first starting after end + 1) either
+        # overlap or are adjacent to the new range, and are replaced by a single merged range
+        lo = bisect.bisect_left(self._ends, start - 1)
+        hi = bisect.bisect_right(self._starts, end + 1, lo)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
     def includes(self, i):
-        for r in self._ranges:
-            if r[0] <= i <= r[1]:
-                return True
-        return False
+        index = bisect.bisect_right(self._starts, i) - 1
+        return index >= 0 and i <= self._ends[index]
     def includes_range(self, start, end):
-        for r in self._ranges:
-            if start >= r[0] and end <= r[1]:
-                return True
-        return False
+        index = bisect.bisect_right(self._starts, start) - 1
+        return index >= 0 and end <= self._ends[index]
 
 class NoSuchPath(Exception):
     pass
@@ -165,21 +195,23 @@ class Graph:
     def __init__(self):
         self._nodes = set()
         self._edges = set()
+        # A dictionary mapping each node to a list of (neighbor, length) tuples, one for each edge of the node, built on
+        # first use and discarded on modification. The edges are added in sorted order, so that the order in which the
+        # searches visit neighbors does not depend on the iteration order of _edges, which varies with the hash seed.
+        self._adjacency = None
     def add_node(self, node):
         self._nodes.add(node)
+        self._adjacency = None
     def add_edge(self, node_a, node_b, length=1):
         self._edges.add((node_a, node_b, length))
+        self._adjacency = None
     def has_node(self, node):
         return node in self._nodes
     def neighbors(self, node):
-        for edge in self._edges:
-            if edge[0] == node:
-                yield edge[1], edge[2]
-            elif edge[1] == node:
-                yield edge[0], edge[2]
+        return iter(self._get_adjacency().get(node, ()))
     def shortest_path(self, source, dest):
         """Use an implementation of Dijkstra's algorithm to find the shortest path between two nodes in this graph. This
-        method is deterministic.
+        method is deterministic as long as the nodes can be ordered (eg. strings).
 
         Args:
             source: the source node
@@ -188,27 +220,31 @@ class Graph:
             a list representing one of the shortest paths from source to dest, the first element being source and the
             last element being dest
         """
-        unvisited = self._nodes.copy()
-        dist = {}
-        for node in self._nodes:
-            dist[node] = math.inf
+        dist = {source: 0}
         prev = {}
-        dist[source] = 0
+        visited = set()
+        # Entries are (distance, insertion order, node); the insertion order breaks ties deterministically without
+        # ever comparing the nodes themselves
+        heap = [(0, 0, source)]
+        counter = itertools.count(1)
         while True:
-            current = min(unvisited, key=lambda n: (dist[n], hash(n)))
-            if dist[current] == math.inf:
+            if not heap:
                 raise NoSuchPath()
-            unvisited.remove(current)
+            current_dist, _, current = heapq.heappop(heap)
+            if current in visited:
+                continue
+            if current == dest:
+                break
+            visited.add(current)
             for neighbor, length in self.neighbors(current):
-                if neighbor not in unvisited:
+                if neighbor in visited:
                     continue
-                tentative = dist[current] + length
-                if tentative < dist[neighbor]:
+                tentative = current_dist + length
+                if tentative < dist.get(neighbor, math.inf):
                     dist[neighbor] = tentative
                     prev[neighbor] = current
-            if current == dest:
-                break
-        del unvisited
+                    heapq.heappush(heap, (tentative, next(counter), neighbor))
+        del heap
         del dist
         path = []
         current = dest
@@ -219,3 +255,231 @@ class Graph:
             current = prev[current]
         path.reverse()
         return path
+    def bidirectional_shortest_path(self, source, dest, max_depth=None):
+        """Find one of the paths between two nodes in this graph with the fewest edges, ignoring the lengths of the
+        edges, using a breadth-first search from both nodes at once that always expands the smaller of the two
+        frontiers. This inspects far fewer nodes than a search from one end when some nodes (eg. major currencies) have
+        very many neighbors. This method is deterministic as long as the nodes can be ordered (eg. strings).
+
+        Args:
+            source: the source node
+            dest: the destination node
+            max_depth: the maximum number of edges in the path, or None for no limit
+        Returns:
+            a list representing one of the paths from source to dest with the fewest edges, the first element being
+            source and the last element being dest
+        Raises:
+            NoSuchPath: if there is no such path with at most max_depth edges
+        """
+        if source not in self._nodes or dest not in self._nodes:
+            raise NoSuchPath()
+        if source == dest:
+            return [source]
+        adjacency = self._get_adjacency()
+        # Map each node reached from either end to the node from which it was reached (None for the ends themselves)
+        source_parents = {source: None}
+        dest_parents = {dest: None}
+        source_frontier = [source]
+        dest_frontier = [dest]
+        depth = 0
+        while source_frontier and dest_frontier:
+            if max_depth is not None and depth >= max_depth:
+                break
+            depth += 1
+            from_source = len(source_frontier) <= len(dest_frontier)
+            if from_source:
+                frontier, parents, other_parents = source_frontier, source_parents, dest_parents
+            else:
+                frontier, parents, other_parents = dest_frontier, dest_parents, source_parents
+            next_frontier = []
+            for node in frontier:
+                for neighbor, length in adjacency[node]:
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = node
+                    if neighbor in other_parents:
+                        path = []
+                        current = neighbor
+                        while current is not None:
+                            path.append(current)
+                            current = source_parents[current]
+                        path.reverse()
+                        current = dest_parents[neighbor]
+                        while current is not None:
+                            path.append(current)
+                            current = dest_parents[current]
+                        return path
+                    next_frontier.append(neighbor)
+            if from_source:
+                source_frontier = next_frontier
+            else:
+                dest_frontier = next_frontier
+        raise NoSuchPath()
+    def _get_adjacency(self):
+        if self._adjacency is None:
+            adjacency = {node: [] for node in self._nodes}
+            try:
+                edges = sorted(self._edges)
+            except TypeError:
+                # Nodes that cannot be ordered are visited in an arbitrary order
+                edges = self._edges
+            for node_a, node_b, length in edges:
+                adjacency.setdefault(node_a, []).append((node_b, length))
+                adjacency.setdefault(node_b, []).append((node_a, length))
+            self._adjacency = adjacency
+        return self._adjacency
+
+class AsyncBatch:
+    """A queue of requests which are performed in batches on background threads.
+
+    Requests are grouped by kind: whenever the background thread wakes up, it waits a short time for more requests to
+    arrive and then picks up all of the requests in the queue (or max_batch of them), so that every outstanding request
+    of the same kind is handed to a single call of the execute function.
+
+    Args:
+        execute: a callable taking a request kind and a list of request arguments and returning a list of results, one
+                 for each request argument and in the same order; if a result is an exception, it will be raised to the
+                 waiter instead of returned
+        max_workers: the maximum number of batches that may be executed at the same time
+        max_batch: the maximum number of requests to include in a single batch
+        delay: the time, in seconds, to wait for more requests after the first request in a batch arrives
+
+    The background threads are started by the first request and run until close() is called; an AsyncBatch may also be
+    used as a context manager, which closes it on exit.
+    """
+    def __init__(self, execute, max_workers=1, max_batch=100, delay=0.005):
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer")
+        if max_batch < 1:
+            raise ValueError("max_batch must be a positive integer")
+        self._execute = execute
+        self._max_workers = max_workers
+        self._max_batch = max_batch
+        self._delay = delay
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._thread = None
+        self._closed = False
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    def submit(self, kind, arg):
+        """Add a request to the queue.
+
+        Args:
+            kind: the kind of the request; only requests of the same kind are batched together
+            arg: the argument for this request which will be passed to the execute function
+        Returns:
+            a concurrent.futures.Future which will hold the result of the request
+        Raises:
+            RuntimeError: if this AsyncBatch has been closed
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("AsyncBatch is closed")
+            if self._thread is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            # Queued while holding the lock so that no request can be queued after the sentinel put by close()
+            self._queue.put((kind, arg, future))
+        return future
+    def close(self, wait=True):
+        """Stop the background threads once every request already submitted has been performed. Requests may not be
+        submitted after this is called. Calling this more than once has no further effect.
+
+        Args:
+            wait: True to wait for the outstanding requests to be performed and the threads to stop, or False to return
+                  immediately
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                # A None request tells the dispatching thread to stop after dispatching everything queued before it
+                self._queue.put(None)
+        if thread is not None:
+            if wait and thread is not threading.current_thread():
+                thread.join()
+            self._executor.shutdown(wait=wait)
+    def _run(self):
+        stopping = False
+        while not stopping:
+            pending = [self._queue.get()]
+            if pending[0] is not None:
+                time.sleep(self._delay)
+            while len(pending) < self._max_batch:
+                try:
+                    pending.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in pending:
+                stopping = True
+                pending = [request for request in pending if request is not None]
+            batches = {}
+            for kind, arg, future in pending:
+                if future.set_running_or_notify_cancel():
+                    batches.setdefault(kind, []).append((arg, future))
+            for kind, batch in batches.items():
+                self._executor.submit(self._run_batch, kind, batch)
+    def _run_batch(self, kind, batch):
+        try:
+            results = self._execute(kind, [arg for arg, future in batch])
+        except BaseException as e:
+            for arg, future in batch:
+                future.set_exception(e)
+            return
+        results = list(results)
+        for i, (arg, future) in enumerate(batch):
+            if i >= len(results):
+                # Never leave a waiter hanging if the execute function returned too few results
+                future.set_exception(RuntimeError("No result was returned for this request"))
+            elif isinstance(results[i], BaseException):
+                future.set_exception(results[i])
+            else:
+                future.set_result(results[i])
+
+class TokenBucket:
+    """A thread-safe token bucket rate limiter.
+
+    Tokens are added to the bucket at a fixed rate, up to a maximum (the burst size), and each operation being limited
+    takes one or more tokens from the bucket, first blocking until enough tokens have been added. This allows short
+    bursts of operations while limiting their long term rate.
+
+    Args:
+        rate: the number of tokens added to the bucket per second
+        burst: the maximum number of tokens the bucket holds, which is also the number it starts with
+    """
+    def __init__(self, rate, burst):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        if burst < 1:
+            raise ValueError("burst must be >= 1")
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+    def acquire(self, weight=1):
+        """Take tokens from the bucket, blocking until they have been added if there are not enough.
+
+        Tokens are reserved immediately, so callers are served in the order in which they call this method.
+
+        Args:
+            weight: the number of tokens to take, which must not be greater than the burst size
+        """
+        if weight > self._burst:
+            raise ValueError("weight must be <= burst")
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._last_refill) * self._rate)
+            self._last_refill = now
+            self._tokens -= weight
+            deficit = -self._tokens
+        if deficit > 0:
+            time.sleep(deficit / self._rate)
@@ -0,0 +1,74 @@
+# License for the Dodixie project, originally found here:
+# https://github.com/parkerhoyes/dodixie
+#
+# Copyright (C) 2017 Parker Hoyes <contact@parkerhoyes.com>
+#
+# This software is provided "as-is", without any express or implied warranty. In
+# no event will the authors be held liable for any damages arising from the use of
+# this software.
+#
+# Permission is granted to anyone to use this software for any purpose, including
+# commercial applications, and to alter it and redistribute it freely, subject to
+# the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not claim
+#    that you wrote the original software. If you use this software in a product,
+#    an acknowledgment in the product documentation would be appreciated but is
+#    not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+
+import os
+import subprocess
+import sys
+import unittest
+
+from dodixie.utils import Graph, NoSuchPath
+
+# Prints the paths found in a graph with many equally short paths between its nodes
+_PATHS_SCRIPT = """
+import random
+from dodixie.utils import Graph
+rng = random.Random(1)
+graph = Graph()
+nodes = ['N{}'.format(i) for i in range(40)]
+for node in nodes:
+    graph.add_node(node)
+for _ in range(150):
+    graph.add_edge(*rng.sample(nodes, 2))
+print([graph.bidirectional_shortest_path('N0', node) for node in nodes])
+print([graph.shortest_path('N0', node) for node in nodes])
+"""
+
+class GraphTest(unittest.TestCase):
+    def test_shortest_path(self):
+        graph = Graph()
+        for node in 'ABCD':
+            graph.add_node(node)
+        graph.add_edge('A', 'B', 1)
+        graph.add_edge('B', 'D', 1)
+        graph.add_edge('A', 'C', 1)
+        graph.add_edge('C', 'D', 5)
+        self.assertEqual(graph.shortest_path('A', 'D'), ['A', 'B', 'D'])
+        self.assertEqual(graph.bidirectional_shortest_path('D', 'A'), ['D', 'B', 'A'])
+    def test_no_path(self):
+        graph = Graph()
+        for node in 'ABC':
+            graph.add_node(node)
+        graph.add_edge('A', 'B')
+        with self.assertRaises(NoSuchPath):
+            graph.bidirectional_shortest_path('A', 'C')
+        with self.assertRaises(NoSuchPath):
+            graph.bidirectional_shortest_path('A', 'B', max_depth=0)
+    def test_paths_do_not_depend_on_hash_seed(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        outputs = set()
+        for seed in ['1', '2', '3']:
+            env = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=root)
+            outputs.add(subprocess.run([sys.executable, '-c', _PATHS_SCRIPT], env=env, check=True,
+                    stdout=subprocess.PIPE).stdout)
+        self.assertEqual(len(outputs), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+# License for the Dodixie project, originally found here:
+# https://github.com/parkerhoyes/dodixie
+#
+# Copyright (C) 2017 Parker Hoyes <contact@parkerhoyes.com>
+#
+# This software is provided "as-is", without any express or implied warranty. In
+# no event will the authors be held liable for any damages arising from the use of
+# this software.
+#
+# Permission is granted to anyone to use this software for any purpose, including
+# commercial applications, and to alter it and redistribute it freely, subject to
+# the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not claim
+#    that you wrote the original software. If you use this software in a product,
+#    an acknowledgment in the product documentation would be appreciated but is
+#    not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+
+import random
+import unittest
+
+from dodixie.utils import IntRanges
+
+class IntRangesTest(unittest.TestCase):
+    def test_empty(self):
+        ranges = IntRanges()
+        self.assertFalse(ranges.includes(0))
+        self.assertFalse(ranges.includes_range(0, 0))
+    def test_single_range(self):
+        ranges = IntRanges((10, 20))
+        self.assertTrue(ranges.includes(10))
+        self.assertTrue(ranges.includes(15))
+        self.assertTrue(ranges.includes(20))
+        self.assertFalse(ranges.includes(9))
+        self.assertFalse(ranges.includes(21))
+    def test_containment(self):
+        ranges = IntRanges((10, 20))
+        self.assertTrue(ranges.includes_range(10, 20))
+        self.assertTrue(ranges.includes_range(12, 18))
+        self.assertFalse(ranges.includes_range(9, 20))
+        self.assertFalse(ranges.includes_range(10, 21))
+        self.assertFalse(ranges.includes_range(0, 5))
+    def test_disjoint_ranges(self):
+        ranges = IntRanges((30, 40), (10, 20))
+        self.assertTrue(ranges.includes(15))
+        self.assertTrue(ranges.includes(35))
+        self.assertFalse(ranges.includes(25))
+        self.assertFalse(ranges.includes_range(15, 35))
+    def test_adjacent_ranges_merge(self):
+        ranges = IntRanges((10, 20), (21, 30))
+        self.assertTrue(ranges.includes_range(10, 30))
+        ranges = IntRanges((21, 30), (10, 20))
+        self.assertTrue(ranges.includes_range(10, 30))
+    def test_gap_of_one_does_not_merge(self):
+        ranges = IntRanges((10, 20), (22, 30))
+        self.assertFalse(ranges.includes(21))
+        self.assertFalse(ranges.includes_range(10, 30))
+    def test_overlapping_ranges_merge(self):
+        ranges = IntRanges((10, 20), (15, 25))
+        self.assertTrue(ranges.includes_range(10, 25))
+        ranges = IntRanges((15, 25), (10, 20))
+        self.assertTrue(ranges.includes_range(10, 25))
+    def test_range_covering_several(self):
+        ranges = IntRanges((10, 12), (20, 22), (30, 32), (50, 60))
+        ranges.add_range(5, 40)
+        self.assertTrue(ranges.includes_range(5, 40))
+        self.assertFalse(ranges.includes(45))
+        self.assertTrue(ranges.includes_range(50, 60))
+        self.assertFalse(ranges.includes_range(5, 60))
+    def test_range_within_existing(self):
+        ranges = IntRanges((10, 30))
+        ranges.add_range(15, 20)
+        self.assertTrue(ranges.includes_range(10, 30))
+        self.assertFalse(ranges.includes(31))
+    def test_single_points(self):
+        ranges = IntRanges((5, 5), (7, 7))
+        self.assertFalse(ranges.includes(6))
+        ranges.add_range(6, 6)
+        self.assertTrue(ranges.includes_range(5, 7))
+    def test_matches_set_of_integers(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            ranges = IntRanges()
+            integers = set()
+            for _ in range(rng.randint(0, 15)):
+                start = rng.randint(0, 100)
+                end = start + rng.randint(0, 10)
+                ranges.add_range(start, end)
+                integers.update(range(start, end + 1))
+            for i in range(-2, 115):
+                self.assertEqual(ranges.includes(i), i in integers)
+            for _ in range(50):
+                start = rng.randint(-2, 112)
+                end = start + rng.randint(0, 15)
+                self.assertEqual(ranges.includes_range(start, end), all(i in integers for i in range(start, end + 1)))
+
+if __name__ == '__main__':
+    unittest.main()
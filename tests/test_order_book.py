@@ -0,0 +1,74 @@
+# License for the Dodixie project, originally found here:
+# https://github.com/parkerhoyes/dodixie
+#
+# Copyright (C) 2017 Parker Hoyes <contact@parkerhoyes.com>
+#
+# This software is provided "as-is", without any express or implied warranty. In
+# no event will the authors be held liable for any damages arising from the use of
+# this software.
+#
+# Permission is granted to anyone to use this software for any purpose, including
+# commercial applications, and to alter it and redistribute it freely, subject to
+# the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not claim
+#    that you wrote the original software. If you use this software in a product,
+#    an acknowledgment in the product documentation would be appreciated but is
+#    not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+
+from decimal import Decimal
+import unittest
+
+from dodixie.api import InsufficientInformationError, OrderBook
+
+class PriceForVolumeTest(unittest.TestCase):
+    def setUp(self):
+        self.book = OrderBook.from_raw([['0.05', '3'], ['0.049', '2.5'], ['0.048', '10']],
+                [['0.051', '1'], ['0.052', '4']])
+    def test_cumulative_base(self):
+        self.assertEqual(self.book.cumulative_base('bids'), (Decimal('3'), Decimal('5.5'), Decimal('15.5')))
+        self.assertEqual(self.book.cumulative_base('asks'), (Decimal('1'), Decimal('5')))
+    def test_zero_volume(self):
+        self.assertEqual(self.book.price_for_volume('asks', 0), 0)
+    def test_partial_fill_of_first_level(self):
+        self.assertEqual(self.book.price_for_volume('asks', '0.5'), Decimal('0.0255'))
+        self.assertEqual(self.book.price_for_volume('bids', 2), Decimal('0.1'))
+    def test_whole_levels(self):
+        self.assertEqual(self.book.price_for_volume('asks', 1), Decimal('0.051'))
+        self.assertEqual(self.book.price_for_volume('bids', '5.5'), Decimal('0.2725'))
+    def test_partial_fill_of_later_level(self):
+        # 1 at 0.051 and then 1.5 of the 4 at 0.052
+        self.assertEqual(self.book.price_for_volume('asks', '2.5'), Decimal('0.129'))
+        # 3 at 0.05, 2.5 at 0.049, and then 4.5 of the 10 at 0.048
+        self.assertEqual(self.book.price_for_volume('bids', 10), Decimal('0.4885'))
+    def test_entire_side(self):
+        self.assertEqual(self.book.price_for_volume('asks', 5), Decimal('0.259'))
+    def test_volume_beyond_depth(self):
+        with self.assertRaises(InsufficientInformationError):
+            self.book.price_for_volume('asks', '5.00000001')
+        with self.assertRaises(InsufficientInformationError):
+            self.book.price_for_volume('bids', 100)
+    def test_empty_side(self):
+        book = OrderBook.from_raw([], [])
+        self.assertEqual(book.price_for_volume('asks', 0), 0)
+        with self.assertRaises(InsufficientInformationError):
+            book.price_for_volume('asks', 1)
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            self.book.price_for_volume('asks', -1)
+        with self.assertRaises(ValueError):
+            self.book.price_for_volume('middle', 1)
+    def test_replace_recomputes_totals(self):
+        book = self.book._replace(ask_amounts=(Decimal('2'), Decimal('4')))
+        self.assertEqual(book.cumulative_base('asks'), (Decimal('2'), Decimal('6')))
+        self.assertEqual(book.price_for_volume('asks', 3), Decimal('0.154'))
+        self.assertIs(book.bid_totals, self.book.bid_totals)
+    def test_no_instance_dict(self):
+        self.book.price_for_volume('asks', 1)
+        self.assertFalse(hasattr(self.book, '__dict__'))
+
+if __name__ == '__main__':
+    unittest.main()